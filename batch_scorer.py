@@ -0,0 +1,80 @@
+from typing import List, Set, Tuple
+
+from enums import Color, Connector, Direction
+from connection import Connection
+from tile import Tile
+
+try:
+  import numpy
+except ImportError:
+  # optional, without numpy the frontier gets scored one coord at a time
+  numpy = None
+
+
+class BatchScorer:
+  # scores many frontier coords against every tile orientation at once
+  # an empty neighbor is the extra OPEN row of the score table, scoring 1 against any edge
+  OPEN = Connection.EDGE_CODE_COUNT
+
+  def __init__(self, tiles: List[Tile], edge_scores: Tuple[Tuple[int, ...], ...]):
+    # row tile index * 4 + rotation count: north, east, south, west edge codes
+    self._tile_count = len(tiles)
+    self._orientation_codes = numpy.array([tile.orientation_codes(rotation_count=rotation_count) for tile in tiles for rotation_count in range(0, 4)], dtype=numpy.intp).reshape(-1, 4)
+    self._edge_scores = numpy.array(list(edge_scores) + [(1,) * Connection.EDGE_CODE_COUNT], dtype=numpy.int64)
+
+  @classmethod
+  def is_supported(cls) -> bool:
+    return numpy is not None
+
+  @property
+  def tile_count(self) -> int:
+    return self._tile_count
+
+  def fitting(self, neighbor_codes: List[Tuple[int, int, int, int]], available: Set[Tuple[int, int]], allow_rotation: bool) -> List[Tuple[int, List[Tuple[int, int]]]]:
+    # neighbor_codes holds per coord the edge code each neighbor faces it with, OPEN for no neighbor
+    # gives per coord its score, 0 when nothing fits, and the fitting (tile index, rotation count) in order
+    available_mask = numpy.zeros(self._tile_count * 4, dtype=bool)
+    if len(available) > 0:
+      available_mask[[tile_idx * 4 + rotation_count for (tile_idx, rotation_count) in available if allow_rotation or rotation_count == 0]] = True
+
+    neighbor_codes = numpy.array(neighbor_codes, dtype=numpy.intp).reshape(-1, 4)
+    # coords x orientations, the product of the 4 edge scores
+    scores = numpy.ones((len(neighbor_codes), self._tile_count * 4), dtype=numpy.int64)
+    for side in range(0, 4):
+      scores *= self._edge_scores[neighbor_codes[:, side, None], self._orientation_codes[None, :, side]]
+    scores *= available_mask
+
+    best_orientations = scores.argmax(axis=1)
+    best_scores = scores[numpy.arange(len(neighbor_codes)), best_orientations]
+    fitting = []
+    for coord_idx in range(0, len(neighbor_codes)):
+      orientations = numpy.flatnonzero(scores[coord_idx]).tolist()
+      fitting.append((int(best_scores[coord_idx]), [divmod(orientation, 4) for orientation in orientations]))
+
+    return fitting
+
+
+if __name__ == '__main__' and BatchScorer.is_supported():
+  tile_1 = Tile(
+    north=None,
+    east=Connection(color=Color.RED, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.PURPLE, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  tile_2 = Tile(
+    north=None,
+    east=Connection(color=Color.PURPLE, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.YELLOW, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  edge_scores = tuple(tuple(int(Connection.is_compatible_code(code_1=code_1, code_2=code_2)) for code_2 in range(0, Connection.EDGE_CODE_COUNT)) for code_1 in range(0, Connection.EDGE_CODE_COUNT))
+  scorer = BatchScorer(tiles=[tile_1, tile_2], edge_scores=edge_scores)
+  available = {(tile_idx, rotation_count) for tile_idx in range(0, 2) for rotation_count in range(0, 4)}
+  open_coord = (BatchScorer.OPEN,) * 4
+  # west of tile_1 only tile_2 fits, unturned
+  west_of_tile_1 = (BatchScorer.OPEN, tile_1.west.code, BatchScorer.OPEN, BatchScorer.OPEN)
+  assert scorer.fitting(neighbor_codes=[open_coord, west_of_tile_1], available=available, allow_rotation=True) == [(1, sorted(available)), (1, [(1, 0)])]
+  assert scorer.fitting(neighbor_codes=[west_of_tile_1], available=available - {(1, 0)}, allow_rotation=True) == [(0, [])]
+  assert scorer.fitting(neighbor_codes=[open_coord], available=available, allow_rotation=False) == [(1, [(0, 0), (1, 0)])]
@@ -0,0 +1,181 @@
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from enums import Color, Direction, Connector
+from connection import Connection
+from tile import Tile
+from puzzle import Puzzle, _greedy_subtree
+from puzzle_board_viewer import view_board
+from puzzle_solver import _tiles
+from tile_generator import generate_tiles
+
+DEFAULT_SEED = 2023
+DEFAULT_REPEAT = 5
+# slower than the baseline by more than this fraction is a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+def _half_solved_puzzle(seed: int) -> Puzzle:
+  # the 28 tiles with the first half of a greedy solution placed
+  puzzle = Puzzle(tiles=_tiles())
+  (solution, _) = puzzle.solve_anytime(allow_rotation=True, seed=seed)
+  return puzzle.replay(moves=solution[:len(solution) // 2])
+
+
+def _road_chain(length: int) -> List[Tile]:
+  # synthetic set of identical straight roads, only solved by one long row
+  return [Tile(
+    north=None,
+    east=Connection(color=Color.BEIGE, direction=Direction.EAST, connector=Connector.ROAD),
+    south=None,
+    west=Connection(color=Color.BEIGE, direction=Direction.WEST, connector=Connector.ROAD)
+  ) for _ in range(0, length)]
+
+
+def bench_can_connect(seed: int) -> Callable[[], None]:
+  tiles = _tiles()
+  rng = random.Random(seed)
+  pairs = [(rng.choice(tiles), rng.choice(tiles), rng.randrange(0, 4), rng.randrange(0, 4)) for _ in range(0, 1000)]
+
+  def run() -> None:
+    for (tile_1, tile_2, side_1, side_2) in pairs:
+      tile_1.can_connect(self_edge=tile_1.orientation(rotation_count=0)[side_1], tile=tile_2, tile_edge=tile_2.orientation(rotation_count=0)[side_2])
+
+  return run
+
+
+def bench_can_place_tile(seed: int) -> Callable[[], None]:
+  puzzle = _half_solved_puzzle(seed=seed)
+  coords = sorted(puzzle.allowed_coords)
+  tiles = puzzle.remaining_tiles()
+
+  def run() -> None:
+    for coord in coords:
+      for tile in tiles:
+        for rotation_count in range(0, 4):
+          puzzle.can_place_tile(tile=tile, coord=coord, rotation_count=rotation_count)
+
+  return run
+
+
+def bench_next_moves(seed: int) -> Callable[[], None]:
+  puzzle = _half_solved_puzzle(seed=seed)
+  last_move = puzzle.placed_moves()[-1]
+
+  def run() -> None:
+    # every frontier coord scored from scratch, as after any undo
+    puzzle.undo()
+    puzzle.place_tile(tile=last_move.tile, rotation_count=last_move.rotation_count, coord=last_move.coord)
+    puzzle.next_moves(allow_rotation=True)
+
+  return run
+
+
+def bench_solve(tiles: List[Tile], seed: int, beam_width: int = 1, deepest_first: bool = False) -> Callable[[], None]:
+  # the greedy, beam or deepest first search solve runs from every first tile, without the rendering view_board is timed for
+  def run() -> None:
+    for first_tile_idx in range(0, len(tiles)):
+      _greedy_subtree(tiles=tiles, first_tile_idx=first_tile_idx, allow_rotation=True, seed=seed + first_tile_idx, beam_width=beam_width, deepest_first=deepest_first)
+
+  return run
+
+
+def bench_greedy(tiles: List[Tile], seed: int) -> Callable[[], None]:
+  # a single greedy run's worth of placements, for sets too large to try every first tile
+  puzzle = Puzzle(tiles=tiles)
+
+  def run() -> None:
+    puzzle.solve_anytime(allow_rotation=True, seed=seed, max_nodes=len(tiles))
+
+  return run
+
+
+def bench_view_board(seed: int) -> Callable[[], None]:
+  puzzle = _half_solved_puzzle(seed=seed)
+
+  def run() -> None:
+    with tempfile.TemporaryDirectory() as board_dir:
+      view_board(board=puzzle.board, output_file=os.path.join(board_dir, 'board.png'))
+
+  return run
+
+
+# benchmark name: function of the seed giving the function to time
+BENCHMARKS: Dict[str, Callable[[int], Callable[[], None]]] = {
+  'tile_can_connect': bench_can_connect,
+  'puzzle_can_place_tile': bench_can_place_tile,
+  'puzzle_next_moves': bench_next_moves,
+  'solve_28_tiles': lambda seed: bench_solve(tiles=_tiles(), seed=seed),
+  'solve_28_tiles_beam_4': lambda seed: bench_solve(tiles=_tiles(), seed=seed, beam_width=4),
+  'solve_28_tiles_deepest_first': lambda seed: bench_solve(tiles=_tiles(), seed=seed, deepest_first=True),
+  'solve_road_chain_40': lambda seed: bench_solve(tiles=_road_chain(length=40), seed=seed),
+  'greedy_synthetic_100': lambda seed: bench_greedy(tiles=generate_tiles(count=100, seed=seed)[0], seed=seed),
+  'greedy_synthetic_300': lambda seed: bench_greedy(tiles=generate_tiles(count=300, seed=seed)[0], seed=seed),
+  'view_board': bench_view_board,
+}
+
+
+def run_benchmarks(names: List[str], seed: int = DEFAULT_SEED, repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+  # the best of repeat runs in seconds, the least disturbed by anything else running
+  results = {}
+  for name in names:
+    timed = BENCHMARKS[name](seed)
+    timings = []
+    for _ in range(0, repeat):
+      start = time.perf_counter()
+      timed()
+      timings.append(time.perf_counter() - start)
+    results[name] = min(timings)
+
+  return results
+
+
+def regressions(results: Dict[str, float], baseline: Dict[str, float], tolerance: float = DEFAULT_TOLERANCE) -> Dict[str, float]:
+  # benchmark name: how much slower than the baseline, as a fraction, for the ones beyond the tolerance
+  slower = {}
+  for name, seconds in results.items():
+    if name in baseline and baseline[name] > 0 and seconds > baseline[name] * (1 + tolerance):
+      slower[name] = seconds / baseline[name] - 1
+
+  return slower
+
+
+def main(argv: List[str] = None) -> int:
+  parser = argparse.ArgumentParser(description='times the hot paths of the solver')
+  parser.add_argument('--only', nargs='*', choices=sorted(BENCHMARKS), default=list(BENCHMARKS), help='benchmarks to run')
+  parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+  parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+  parser.add_argument('--save', help='write the results as the baseline json file')
+  parser.add_argument('--baseline', help='report regressions against this baseline json file')
+  parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+  args = parser.parse_args(argv)
+
+  results = run_benchmarks(names=args.only, seed=args.seed, repeat=args.repeat)
+  baseline = {}
+  if args.baseline is not None:
+    with open(args.baseline) as baseline_file:
+      baseline = json.load(baseline_file)['results']
+
+  for name, seconds in results.items():
+    change = f" ({seconds / baseline[name] - 1:+.0%} vs baseline)" if baseline.get(name) else ''
+    print(f"⏱️  {name}: {seconds * 1000:.3f} ms{change}")
+
+  if args.save is not None:
+    with open(args.save, 'w') as baseline_file:
+      json.dump({'seed': args.seed, 'repeat': args.repeat, 'results': results}, baseline_file, indent=2, sort_keys=True)
+
+  slower = regressions(results=results, baseline=baseline, tolerance=args.tolerance)
+  for name, fraction in slower.items():
+    print(f"🐢 regression {name}: {fraction:+.0%}")
+
+  return 1 if len(slower) > 0 else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
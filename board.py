@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+from enums import Color, Connector, Direction
+from connection import Connection
+from tile import Tile, PlacedTile
+
+
+class Board(dict):
+  # sparse board mapping (row, col) to the tile placed there in its rotation, grows in every direction as tiles are placed
+  def __init__(self):
+    super().__init__()
+    # (min row, min col, max row, max col) of the occupied coords, None when it needs to be recomputed
+    self._bounds: Tuple[int, int, int, int] = None
+
+  @property
+  def bounding_box(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    # top left and bottom right occupied coords, None on an empty board
+    if len(self) == 0:
+      return None
+
+    if self._bounds is None:
+      rows = [row for (row, _) in self]
+      cols = [col for (_, col) in self]
+      self._bounds = (min(rows), min(cols), max(rows), max(cols))
+
+    (min_row, min_col, max_row, max_col) = self._bounds
+    return ((min_row, min_col), (max_row, max_col))
+
+  def clear(self) -> None:
+    super().clear()
+    self._bounds = None
+
+  def __missing__(self, coord: Tuple[int, int]) -> PlacedTile:
+    # empty coords hold no tile
+    return None
+
+  def __setitem__(self, coord: Tuple[int, int], placed_tile: PlacedTile) -> None:
+    super().__setitem__(coord, placed_tile)
+    if self._bounds is not None:
+      (min_row, min_col, max_row, max_col) = self._bounds
+      self._bounds = (min(min_row, coord[0]), min(min_col, coord[1]), max(max_row, coord[0]), max(max_col, coord[1]))
+    elif len(self) == 1:
+      self._bounds = (coord[0], coord[1], coord[0], coord[1])
+
+  def __delitem__(self, coord: Tuple[int, int]) -> None:
+    super().__delitem__(coord)
+    # only a coord on the edge of the bounding box can shrink it
+    if self._bounds is not None and (coord[0] in (self._bounds[0], self._bounds[2]) or coord[1] in (self._bounds[1], self._bounds[3])):
+      self._bounds = None
+
+
+if __name__ == '__main__':
+  tile_1 = Tile(
+    north=None,
+    east=Connection(color=Color.RED, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.PURPLE, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  tile_2 = Tile(
+    north=None,
+    east=None,
+    south=Connection(color=Color.GREEN, direction=Direction.SOUTH, connector=Connector.TAIL),
+    west=Connection(color=Color.PURPLE, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  (placed_tile_1, placed_tile_2) = (PlacedTile(tile=tile_1, rotation_count=0), PlacedTile(tile=tile_2, rotation_count=1))
+  board = Board()
+  assert board.bounding_box is None
+  assert board[(20, 20)] is None
+  # the board grows in any direction, far beyond the old 41 x 41 grid
+  board[(20, 20)] = placed_tile_1
+  board[(-75, 120)] = placed_tile_2
+  assert len(board) == 2
+  assert (-75, 120) in board
+  assert board.get((-75, 120)) is placed_tile_2
+  assert board.bounding_box == ((-75, 20), (20, 120))
+  # removing a coord on the edge shrinks the bounding box
+  del board[(-75, 120)]
+  assert board.bounding_box == ((20, 20), (20, 20))
+  assert dict(board.items()) == {(20, 20): placed_tile_1}
+  board.clear()
+  assert len(board) == 0
+  assert board.bounding_box is None
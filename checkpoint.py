@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import Dict, List, Set
+import json
+import os
+import time
+
+from solution_store import SolutionWriter
+
+
+class SearchCheckpoint:
+  # progress of a search split in subtrees: the subtrees done and the path each subtree under way got to, rewritten at
+  # most every interval seconds and when the search stops, so a resumed search skips the subtrees done and goes on
+  # from the paths
+  # a path is the count of options tried at every depth of a depth first search, which is replayed on resume
+  # run holds what the search depends on, e.g. its arguments, its seed and the tile edges, a checkpoint is only
+  # resumed by the same run
+  # the solutions are only kept in the solution store of the search, store_records is how many records it held, the
+  # solutions stored after the checkpoint are dropped on resume since they are found again
+  VERSION = 2
+  DEFAULT_INTERVAL = 60.0
+
+  def __init__(self, path: str, run: Dict, interval: float = DEFAULT_INTERVAL, done_subtrees: List[int] = None, subtree_paths: Dict[int, List[int]] = None, store_records: int = None):
+    self._path = path
+    self._run = run
+    self._interval = interval
+    self._done_subtrees: Set[int] = set(done_subtrees or [])
+    self._subtree_paths: Dict[int, List[int]] = subtree_paths or {}
+    self._store_records = store_records
+    self._store: SolutionWriter = None
+    self._last_write = time.monotonic()
+
+  @classmethod
+  def open(cls, path: str, run: Dict, resume: bool = False, interval: float = DEFAULT_INTERVAL) -> SearchCheckpoint:
+    # with resume, carries on from the checkpoint in path if there is one, run values left None take the saved ones
+    if not resume or not os.path.exists(path):
+      return SearchCheckpoint(path=path, run=run, interval=interval)
+
+    with open(path) as checkpoint_file:
+      saved = json.load(checkpoint_file)
+    if saved.get('version') != SearchCheckpoint.VERSION:
+      raise ValueError(f"{path} is not a search checkpoint")
+    for name, value in run.items():
+      if value is not None and saved['run'].get(name) != value:
+        raise ValueError(f"{path} is the checkpoint of another run, its {name} differs")
+
+    # json object keys are strings
+    subtree_paths = {int(subtree_idx): subtree_path for subtree_idx, subtree_path in saved['subtree_paths'].items()}
+    return SearchCheckpoint(path=path, run=saved['run'], interval=interval, done_subtrees=saved['done_subtrees'], subtree_paths=subtree_paths, store_records=saved['store_records'])
+
+  @property
+  def run(self) -> Dict:
+    return self._run
+
+  @property
+  def done_subtrees(self) -> Set[int]:
+    return self._done_subtrees
+
+  @property
+  def subtree_paths(self) -> Dict[int, List[int]]:
+    return self._subtree_paths
+
+  @property
+  def store_records(self) -> int:
+    return self._store_records
+
+  @property
+  def store(self) -> SolutionWriter:
+    # the solution store of the search, flushed and counted whenever the checkpoint is written
+    return self._store
+
+  @store.setter
+  def store(self, store: SolutionWriter) -> None:
+    self._store = store
+
+  def advance(self, subtree_idx: int, path: List[int]) -> None:
+    # the subtree got to path, with every solution found before it in the store
+    self._subtree_paths[subtree_idx] = path
+    self._write_if_due()
+
+  def record(self, subtree_idx: int) -> None:
+    # the subtree is done, with every solution it found in the store
+    self._done_subtrees.add(subtree_idx)
+    self._subtree_paths.pop(subtree_idx, None)
+    self._write_if_due()
+
+  def _write_if_due(self) -> None:
+    if time.monotonic() - self._last_write >= self._interval:
+      self.write()
+
+  def write(self) -> None:
+    # the file is replaced in one go, a crash while writing leaves the previous checkpoint
+    if self._store is not None:
+      self._store.flush()
+      self._store_records = len(self._store)
+    saved = {
+      'version': SearchCheckpoint.VERSION,
+      'run': self._run,
+      'done_subtrees': sorted(self._done_subtrees),
+      'subtree_paths': self._subtree_paths,
+      'store_records': self._store_records,
+    }
+    with open(f"{self._path}.tmp", 'w') as checkpoint_file:
+      json.dump(saved, checkpoint_file, separators=(',', ':'))
+    os.replace(f"{self._path}.tmp", self._path)
+    self._last_write = time.monotonic()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    # written however the search stops, interrupted ones included
+    self.write()
+
+
+if __name__ == '__main__':
+  import tempfile
+
+  with tempfile.TemporaryDirectory() as checkpoint_dir:
+    path = os.path.join(checkpoint_dir, 'search.checkpoint')
+    run = {'search': 'solve_all', 'tiles': [[0, 1, 0, 2]], 'seed': 7}
+    # nothing to resume yet
+    assert len(SearchCheckpoint.open(path=path, run=run, resume=True).done_subtrees) == 0
+
+    store_path = os.path.join(checkpoint_dir, 'solutions.tpss')
+    try:
+      with SolutionWriter(path=store_path, tile_count=1) as solution_writer, SearchCheckpoint(path=path, run=run, interval=3600) as checkpoint:
+        checkpoint.store = solution_writer
+        for subtree_idx in [2, 3, 5]:
+          solution_writer.append(solution=[(0, 1, (20, 20))])
+          checkpoint.advance(subtree_idx=subtree_idx, path=[1, 0, subtree_idx])
+        checkpoint.record(subtree_idx=2)
+        # not written before the interval is up
+        assert not os.path.exists(path)
+        raise KeyboardInterrupt
+    except KeyboardInterrupt:
+      pass
+
+    resumed = SearchCheckpoint.open(path=path, run=dict(run, seed=None), resume=True)
+    assert resumed.run['seed'] == 7
+    assert resumed.done_subtrees == {2}
+    assert resumed.subtree_paths == {3: [1, 0, 3], 5: [1, 0, 5]}
+    # the store is counted when the checkpoint is written
+    assert resumed.store_records == 3
+    # without resume the saved progress is ignored
+    assert len(SearchCheckpoint.open(path=path, run=run).subtree_paths) == 0
+    # written as soon as the interval is up
+    checkpoint = SearchCheckpoint.open(path=path, run=run, resume=True, interval=0)
+    checkpoint.record(subtree_idx=3)
+    assert SearchCheckpoint.open(path=path, run=run, resume=True).subtree_paths == {5: [1, 0, 5]}
+    try:
+      SearchCheckpoint.open(path=path, run=dict(run, search='solve'), resume=True)
+      assert False
+    except ValueError:
+      pass
@@ -1,12 +1,38 @@
 from __future__ import annotations
+
+from typing import Dict, Tuple
+
 from enums import Connector, Color, Direction
 
 
 class Connection:
-  def __init__(self, connector: Connector, color: Color, direction: Direction):
-    self._connector = connector
-    self._color = color
-    self._direction = direction
+  # every connection is encoded as a small int, 0 being "no edge"
+  NO_EDGE = 0
+  EDGE_CODE_COUNT = 1 + len(Color) * len(Connector) * len(Direction)
+
+  # connections are immutable and interned, there is only ever one instance of each of the 84, so tiles can share them
+  # and comparing them is an identity check
+  __slots__ = ('_connector', '_color', '_direction', '_code')
+  _INTERNED: Dict[Tuple[Connector, Color, Direction], Connection] = {}
+
+  def __new__(cls, connector: Connector, color: Color, direction: Direction):
+    conn = Connection._INTERNED.get((connector, color, direction))
+    if conn is None:
+      conn = object.__new__(cls)
+      object.__setattr__(conn, '_connector', connector)
+      object.__setattr__(conn, '_color', color)
+      object.__setattr__(conn, '_direction', direction)
+      object.__setattr__(conn, '_code', 1 + ((color.value - 1) * len(Connector) + connector.value - 1) * len(Direction) + direction.value - 1)
+      Connection._INTERNED[(connector, color, direction)] = conn
+
+    return conn
+
+  def __setattr__(self, name: str, value) -> None:
+    raise AttributeError(f"{type(self).__name__} is immutable")
+
+  def __reduce__(self):
+    # unpickled connections, e.g. in the worker processes, are the interned ones of that process
+    return (Connection, (self._connector, self._color, self._direction))
 
   @property
   def connector(self) -> Connector:
@@ -20,21 +46,36 @@ class Connection:
   def direction(self) -> Direction:
     return self._direction
 
-  def rotate(self) -> None:
-    # rotate 90 degrees clockwise each time
-    next_enum_value = self._direction.value + 1
-    if next_enum_value == 5:
-      self._direction = Direction(1)
-    else:
-      self._direction = Direction(next_enum_value)
+  @property
+  def code(self) -> int:
+    return self._code
+
+  @classmethod
+  def edge_code(cls, conn: Connection) -> int:
+    return Connection.NO_EDGE if conn is None else conn.code
+
+  @classmethod
+  def from_code(cls, code: int) -> Connection:
+    if code == Connection.NO_EDGE:
+      return None
+
+    (color_connector, direction_idx) = divmod(code - 1, len(Direction))
+    (color_idx, connector_idx) = divmod(color_connector, len(Connector))
+    return Connection(connector=Connector(connector_idx + 1), color=Color(color_idx + 1), direction=Direction(direction_idx + 1))
+
+  @classmethod
+  def is_compatible_code(cls, code_1: int, code_2: int) -> bool:
+    return Connection.COMPATIBLE_EDGES[code_1][code_2]
+
+  def rotated(self) -> Connection:
+    # the connection rotated 90 degrees clockwise
+    return Connection(connector=self._connector, color=self._color, direction=Direction(self._direction.value % 4 + 1))
 
   def __eq__(self, other: Connection) -> bool:
-    return self._connector.value == other.connector.value and \
-      self._color.value == other.color.value and \
-      self._direction.value == other.direction.value
+    return self is other
 
   def __hash__(self):
-    return hash((self._connector, self._color, self._direction))
+    return self._code
 
   def __repr__(self) -> str:
     return f"{self.color.name} {self.connector.name} @ {self.direction.name}"
@@ -49,8 +90,36 @@ class Connection:
     return conn is not None and (self.connector.value + conn.connector.value) % 3 == 0
 
 
+def _compatible_edges_table() -> Tuple[Tuple[bool, ...], ...]:
+  # COMPATIBLE_EDGES[code_1][code_2] tells if the 2 edges can face each other
+  table = []
+  for code_1 in range(0, Connection.EDGE_CODE_COUNT):
+    conn_1 = Connection.from_code(code=code_1)
+    row = []
+    for code_2 in range(0, Connection.EDGE_CODE_COUNT):
+      conn_2 = Connection.from_code(code=code_2)
+      if conn_1 is None:
+        row.append(conn_2 is None)
+      else:
+        row.append(conn_1.is_color_matching(conn=conn_2) and conn_1.is_connector_matching(conn=conn_2) and conn_1.is_direction_matching(conn=conn_2))
+    table.append(tuple(row))
+
+  return tuple(table)
+
+
+def _mating_edges_table() -> Tuple[int, ...]:
+  # MATING_EDGES[code] is the only edge code that can face the given edge
+  return tuple(row.index(True) for row in Connection.COMPATIBLE_EDGES)
+
+
+Connection.COMPATIBLE_EDGES = _compatible_edges_table()
+Connection.MATING_EDGES = _mating_edges_table()
+
+
 # test
 if __name__ == '__main__':
+  import pickle
+
   conn_1 = Connection(connector=Connector.HEAD, color=Color.GREEN, direction=Direction.NORTH)
   conn_2 = Connection(connector=Connector.HEAD, color=Color.ORANGE, direction=Direction.SOUTH)
   conn_3 = Connection(connector=Connector.TAIL, color=Color.GREEN, direction=Direction.EAST)
@@ -69,14 +138,34 @@ if __name__ == '__main__':
   assert conn_1.is_direction_matching(conn=conn_3) is False
   assert conn_1.is_direction_matching(conn=conn_4) is False
   assert conn_3.is_direction_matching(conn=conn_5) is False
+  # test integer encoding
+  assert Connection.edge_code(conn=None) == Connection.NO_EDGE
+  assert len({Connection.from_code(code=code).code for code in range(1, Connection.EDGE_CODE_COUNT)}) == 84
+  assert Connection.from_code(code=conn_4.code) == conn_4
+  assert Connection.is_compatible_code(code_1=conn_4.code, code_2=conn_5.code) is True
+  assert Connection.is_compatible_code(code_1=conn_1.code, code_2=conn_3.code) is False
+  assert Connection.is_compatible_code(code_1=conn_1.code, code_2=conn_2.code) is False
+  assert Connection.is_compatible_code(code_1=Connection.NO_EDGE, code_2=Connection.NO_EDGE) is True
+  assert Connection.is_compatible_code(code_1=conn_1.code, code_2=Connection.NO_EDGE) is False
+  assert Connection.MATING_EDGES[conn_4.code] == conn_5.code
+  assert Connection.MATING_EDGES[Connection.NO_EDGE] == Connection.NO_EDGE
+  assert all(sum(row) == 1 for row in Connection.COMPATIBLE_EDGES)
   # show string representation
   print(conn_1)
-  # test rotate
-  conn_1.rotate()
-  assert conn_1.direction == Direction.EAST
-  conn_1.rotate()
-  assert conn_1.direction == Direction.SOUTH
-  conn_1.rotate()
-  assert conn_1.direction == Direction.WEST
-  conn_1.rotate()
+  # test rotated
+  assert conn_1.rotated().direction == Direction.EAST
+  assert conn_1.rotated().rotated().rotated().rotated() == conn_1
+  assert conn_1.rotated().rotated().direction == Direction.SOUTH
+  assert conn_1.rotated().rotated().rotated().direction == Direction.WEST
   assert conn_1.direction == Direction.NORTH
+  # test interning, equal connections are the same instance and cannot be changed
+  assert Connection(connector=Connector.HEAD, color=Color.GREEN, direction=Direction.NORTH) is conn_1
+  assert conn_1.rotated() is Connection(connector=Connector.HEAD, color=Color.GREEN, direction=Direction.EAST)
+  assert Connection.from_code(code=conn_3.code) is conn_3
+  assert pickle.loads(pickle.dumps(conn_4)) is conn_4
+  try:
+    conn_1._direction = Direction.EAST
+    assert False
+  except AttributeError:
+    pass
+  assert not hasattr(conn_1, '__dict__')
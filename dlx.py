@@ -0,0 +1,335 @@
+from typing import Iterator, List, Tuple
+
+from enums import Color, Connector, Direction
+from connection import Connection
+from tile import Tile
+from board import Board
+from puzzle import Puzzle
+from export_queue import snapshot_board
+
+
+class ExactCover:
+  # dancing links over primary items (covered exactly once) and secondary items (covered at most once, or any number
+  # of times with the same color), Knuth's algorithm C
+  def __init__(self, primary_count: int, secondary_count: int, options: List[List[Tuple[int, int]]]):
+    # items are 0 .. primary_count + secondary_count - 1, primary first, each option is a list of (item, color)
+    # with color 0 for uncolored
+    item_count = primary_count + secondary_count
+    # item i is header node i + 1, node 0 is the head of the primary items and node item_count + 1 of the secondary
+    self._left = [header - 1 for header in range(0, item_count + 2)]
+    self._right = [header + 1 for header in range(0, item_count + 2)]
+    self._left[0] = primary_count
+    self._right[primary_count] = 0
+    self._left[primary_count + 1] = item_count + 1
+    self._right[item_count + 1] = primary_count + 1
+
+    # TOP holds the item of an option node, the option length of a header, minus the option index of a spacer
+    self._top = [0] * (item_count + 2)
+    self._up = list(range(0, item_count + 2))
+    self._down = list(range(0, item_count + 2))
+    self._color = [0] * (item_count + 2)
+
+    # a spacer before every option and after the last one
+    spacer = len(self._top)
+    self._append_node(top=0, up=0, down=0, color=0)
+    for option_idx, option in enumerate(options):
+      first = len(self._top)
+      for (item, color) in option:
+        header = item + 1
+        node = len(self._top)
+        self._append_node(top=header, up=self._up[header], down=header, color=color)
+        self._down[self._up[header]] = node
+        self._up[header] = node
+        self._top[header] += 1
+
+      self._down[spacer] = len(self._top) - 1
+      spacer = len(self._top)
+      self._append_node(top=-(option_idx + 1), up=first, down=0, color=0)
+
+    self._nodes = 0
+
+  @property
+  def nodes(self) -> int:
+    # options tried so far
+    return self._nodes
+
+  def _append_node(self, top: int, up: int, down: int, color: int) -> None:
+    self._top.append(top)
+    self._up.append(up)
+    self._down.append(down)
+    self._color.append(color)
+
+  def _hide(self, p: int) -> None:
+    top, up, down, color = self._top, self._up, self._down, self._color
+    q = p + 1
+    while q != p:
+      x = top[q]
+      if x <= 0:
+        # spacer, back to the first node of the option
+        q = up[q]
+        continue
+
+      if color[q] >= 0:
+        (u, d) = (up[q], down[q])
+        down[u] = d
+        up[d] = u
+        top[x] -= 1
+      q += 1
+
+  def _unhide(self, p: int) -> None:
+    top, up, down, color = self._top, self._up, self._down, self._color
+    q = p - 1
+    while q != p:
+      x = top[q]
+      if x <= 0:
+        # spacer, on to the last node of the option
+        q = down[q]
+        continue
+
+      if color[q] >= 0:
+        (u, d) = (up[q], down[q])
+        down[u] = q
+        up[d] = q
+        top[x] += 1
+      q -= 1
+
+  def _cover(self, header: int) -> None:
+    p = self._down[header]
+    while p != header:
+      self._hide(p=p)
+      p = self._down[p]
+    (l, r) = (self._left[header], self._right[header])
+    self._right[l] = r
+    self._left[r] = l
+
+  def _uncover(self, header: int) -> None:
+    (l, r) = (self._left[header], self._right[header])
+    self._right[l] = header
+    self._left[r] = header
+    p = self._up[header]
+    while p != header:
+      self._unhide(p=p)
+      p = self._up[p]
+
+  def _purify(self, p: int) -> None:
+    # keep only the options giving the item the same color, their nodes are marked with color -1 meanwhile
+    c = self._color[p]
+    header = self._top[p]
+    q = self._down[header]
+    while q != header:
+      if self._color[q] == c:
+        self._color[q] = -1
+      else:
+        self._hide(p=q)
+      q = self._down[q]
+
+  def _unpurify(self, p: int) -> None:
+    c = self._color[p]
+    header = self._top[p]
+    q = self._up[header]
+    while q != header:
+      if self._color[q] < 0:
+        self._color[q] = c
+      else:
+        self._unhide(p=q)
+      q = self._up[q]
+
+  def _commit(self, p: int) -> None:
+    # a node with color -1 is of an item purified to its color already
+    if self._color[p] == 0:
+      self._cover(header=self._top[p])
+    elif self._color[p] > 0:
+      self._purify(p=p)
+
+  def _uncommit(self, p: int) -> None:
+    if self._color[p] == 0:
+      self._uncover(header=self._top[p])
+    elif self._color[p] > 0:
+      self._unpurify(p=p)
+
+  def _other_nodes(self, node: int) -> List[int]:
+    # the nodes of the option holding node, besides node itself, left to right from node
+    nodes = []
+    q = node + 1
+    while q != node:
+      if self._top[q] <= 0:
+        q = self._up[q]
+        continue
+      nodes.append(q)
+      q += 1
+
+    return nodes
+
+  def _option_index(self, node: int) -> int:
+    while self._top[node] > 0:
+      node += 1
+
+    return -self._top[node] - 1
+
+  def _choose_item(self) -> int:
+    # the primary item with the fewest options left
+    best = None
+    header = self._right[0]
+    while header != 0:
+      if best is None or self._top[header] < self._top[best]:
+        best = header
+        if self._top[header] == 0:
+          break
+      header = self._right[header]
+
+    return best
+
+  def solutions(self) -> Iterator[List[int]]:
+    # every set of option indices covering each primary item once, with no clashing secondary items
+    if self._right[0] == 0:
+      yield []
+      return
+
+    # [header, node tried] per level
+    stack = []
+    header = self._choose_item()
+    self._cover(header=header)
+    stack.append([header, header])
+    while len(stack) > 0:
+      frame = stack[-1]
+      (header, node) = frame
+      if node != header:
+        # withdraw the option tried last
+        for q in reversed(self._other_nodes(node=node)):
+          self._uncommit(p=q)
+
+      node = self._down[node]
+      frame[1] = node
+      if node == header:
+        self._uncover(header=header)
+        stack.pop()
+        continue
+
+      self._nodes += 1
+      for q in self._other_nodes(node=node):
+        self._commit(p=q)
+
+      if self._right[0] == 0:
+        yield [self._option_index(node=frame_node) for (_, frame_node) in stack]
+        continue
+
+      next_header = self._choose_item()
+      if self._top[next_header] == 0:
+        continue
+
+      self._cover(header=next_header)
+      stack.append([next_header, next_header])
+
+
+def rectangle(rows: int, cols: int) -> List[Tuple[int, int]]:
+  # the coords of a rows x cols target shape
+  return [(row, col) for row in range(0, rows) for col in range(0, cols)]
+
+
+def shape_layouts(tiles: List[Tile], shape: List[Tuple[int, int]], allow_rotation: bool = False, closed: bool = False) -> Iterator[List[Tuple[int, int, Tuple[int, int]]]]:
+  # every way to fill each coord of the shape with a different tile, facing edges compatible, as compact
+  # (tile position, rotation count, coord) moves like Puzzle.iter_solutions, e.g. for a SolutionWriter
+  # closed layouts have no edge pointing out of the shape
+  # with as many tiles as coords every tile is used, with more tiles some are left out
+  cells = sorted(set(shape))
+  if len(cells) > len(tiles):
+    return
+
+  cell_items = {coord: item for item, coord in enumerate(cells)}
+  tiles_primary = len(tiles) == len(cells)
+  tile_items = [len(cells) + tile_idx for tile_idx in range(0, len(tiles))]
+  # the edges inside the shape, east and south of a coord, are colored with the code of the edge on the east or
+  # south tile as the edge on the west or north tile needs it, so both tiles agree on the color only if compatible
+  edge_items = {}
+  for (row, col) in cells:
+    for neighbor_coord in [(row, col + 1), (row + 1, col)]:
+      if neighbor_coord in cell_items:
+        edge_items[((row, col), neighbor_coord)] = len(cells) + len(tiles) + len(edge_items)
+
+  options = []
+  moves = []
+  rotation_counts = range(0, 4) if allow_rotation else [0]
+  for tile_idx, tile in enumerate(tiles):
+    seen_codes = set()
+    for rotation_count in rotation_counts:
+      codes = tile.orientation_codes(rotation_count=rotation_count)
+      # a symmetric tile turned into the same edges is the same option
+      if codes in seen_codes:
+        continue
+      seen_codes.add(codes)
+
+      for (row, col) in cells:
+        neighbor_coords = [(row - 1, col), (row, col + 1), (row + 1, col), (row, col - 1)]
+        if closed and any(code != Connection.NO_EDGE and neighbor_coord not in cell_items for code, neighbor_coord in zip(codes, neighbor_coords)):
+          continue
+
+        # colors are shifted by one as 0 means uncolored
+        option = [(cell_items[(row, col)], 0), (tile_items[tile_idx], 0)]
+        for side, neighbor_coord in enumerate(neighbor_coords):
+          if neighbor_coord not in cell_items:
+            continue
+          if side in (1, 2):
+            option.append((edge_items[((row, col), neighbor_coord)], Connection.MATING_EDGES[codes[side]] + 1))
+          else:
+            option.append((edge_items[(neighbor_coord, (row, col))], codes[side] + 1))
+
+        options.append(option)
+        moves.append((tile_idx, rotation_count, (row, col)))
+
+  primary_count = len(cells) + (len(tiles) if tiles_primary else 0)
+  secondary_count = (0 if tiles_primary else len(tiles)) + len(edge_items)
+  exact_cover = ExactCover(primary_count=primary_count, secondary_count=secondary_count, options=options)
+  for option_indices in exact_cover.solutions():
+    yield [moves[option_idx] for option_idx in sorted(option_indices)]
+
+
+def layout_board(tiles: List[Tile], layout: List[Tuple[int, int, Tuple[int, int]]]) -> Board:
+  # the layout of the tiles as a board of its own tiles, e.g. for view_board
+  return snapshot_board(placements=[(tiles[tile_idx], rotation_count, coord) for (tile_idx, rotation_count, coord) in layout])
+
+
+if __name__ == '__main__':
+  # items 0 and 1 primary, item 2 secondary
+  exact_cover = ExactCover(primary_count=2, secondary_count=1, options=[[(0, 0), (2, 1)], [(1, 0), (2, 2)], [(1, 0), (2, 1)], [(0, 0), (1, 0)]])
+  assert sorted(sorted(solution) for solution in exact_cover.solutions()) == [[0, 2], [3]]
+  # uncolored secondary items are covered at most once
+  exact_cover = ExactCover(primary_count=2, secondary_count=1, options=[[(0, 0), (2, 0)], [(1, 0), (2, 0)], [(1, 0)]])
+  assert [sorted(solution) for solution in exact_cover.solutions()] == [[0, 2]]
+
+  road = lambda direction: Connection(color=Color.BEIGE, direction=direction, connector=Connector.ROAD)
+  corners = [
+    Tile(north=None, east=road(Direction.EAST), south=road(Direction.SOUTH), west=None),
+    Tile(north=None, east=None, south=road(Direction.SOUTH), west=road(Direction.WEST)),
+    Tile(north=road(Direction.NORTH), east=road(Direction.EAST), south=None, west=None),
+    Tile(north=road(Direction.NORTH), east=None, south=None, west=road(Direction.WEST))
+  ]
+  # the 4 corners close into a loop exactly one way
+  layouts = list(shape_layouts(tiles=corners, shape=rectangle(rows=2, cols=2), closed=True))
+  assert len(layouts) == 1
+  assert layouts[0] == [(0, 0, (0, 0)), (1, 0, (0, 1)), (2, 0, (1, 0)), (3, 0, (1, 1))]
+  # turned, the corners go round the loop in any order
+  assert len(list(shape_layouts(tiles=corners, shape=rectangle(rows=2, cols=2), allow_rotation=True, closed=True))) == 24
+  # in a row the roads only meet between the middle 2 tiles
+  assert len(list(shape_layouts(tiles=corners, shape=rectangle(rows=1, cols=4), closed=True))) == 0
+  assert len(list(shape_layouts(tiles=corners, shape=rectangle(rows=1, cols=2)))) == 8
+  assert len(list(shape_layouts(tiles=corners, shape=rectangle(rows=3, cols=3)))) == 0
+
+  # the same layouts the exhaustive search finds on the same shape
+  layouts = list(shape_layouts(tiles=corners, shape=rectangle(rows=2, cols=2), allow_rotation=True))
+  puzzle = Puzzle(tiles=corners)
+  square_forms = set()
+  for solution in puzzle.solve_all(allow_rotation=True):
+    rows = {move.coord[0] for move in solution}
+    cols = {move.coord[1] for move in solution}
+    if len(rows) == 2 and len(cols) == 2:
+      square_forms.add(Puzzle.canonical_form(moves=solution))
+  assert {Puzzle.canonical_form(moves=puzzle._expand_moves(compact_moves=layout)) for layout in layouts} == square_forms
+  # each board holds its own rotations, building one leaves the others alone
+  turned_layout = next(layout for layout in layouts if any(rotation_count != 0 for (_, rotation_count, _) in layout))
+  board = layout_board(tiles=corners, layout=layouts[0])
+  turned_board = layout_board(tiles=corners, layout=turned_layout)
+  assert board.bounding_box == ((0, 0), (1, 1))
+  assert all(board[coord].rotation_count == rotation_count for (_, rotation_count, coord) in layouts[0])
+  assert all(turned_board[coord].rotation_count == rotation_count for (_, rotation_count, coord) in turned_layout)
+  # every layout replays on a puzzle over the same tiles
+  assert all(len(puzzle.replay(moves=puzzle._expand_moves(compact_moves=layout)).placed_tiles) == 4 for layout in layouts)
@@ -0,0 +1,81 @@
+from typing import Dict, List, Set, Tuple
+
+from enums import Color, Connector, Direction
+from connection import Connection
+from tile import Tile
+
+
+class EdgeIndex:
+  # sides are ordered like the tile edges: north, east, south, west
+  SIDES = (0, 1, 2, 3)
+
+  def __init__(self, tiles: List[Tile] = None):
+    # shares the tiles list so tiles appended later can be added by index
+    self._tiles = tiles if tiles is not None else []
+    # (side, edge code): {(tile index, rotation count)}
+    self._by_edge: Dict[Tuple[int, int], Set[Tuple[int, int]]] = {}
+    self._available: Set[Tuple[int, int]] = set()
+
+    for tile_idx in range(0, len(self._tiles)):
+      self.add(tile_idx=tile_idx)
+
+  @property
+  def available(self) -> Set[Tuple[int, int]]:
+    return self._available
+
+  def add(self, tile_idx: int) -> None:
+    tile = self._tiles[tile_idx]
+    for rotation_count in range(0, 4):
+      entry = (tile_idx, rotation_count)
+      for side, code in zip(EdgeIndex.SIDES, tile.orientation_codes(rotation_count=rotation_count)):
+        self._by_edge.setdefault((side, code), set()).add(entry)
+      self._available.add(entry)
+
+  def discard(self, tile_idx: int) -> None:
+    tile = self._tiles[tile_idx]
+    for rotation_count in range(0, 4):
+      entry = (tile_idx, rotation_count)
+      for side, code in zip(EdgeIndex.SIDES, tile.orientation_codes(rotation_count=rotation_count)):
+        self._by_edge[(side, code)].discard(entry)
+      self._available.discard(entry)
+
+  def candidates(self, required_codes: Tuple[int, int, int, int]) -> Set[Tuple[int, int]]:
+    # required_codes holds the edge code each side must have, None when the side is unconstrained
+    matching_sets = [self._by_edge.get((side, code), set()) for side, code in zip(EdgeIndex.SIDES, required_codes) if code is not None]
+    if len(matching_sets) == 0:
+      return set(self._available)
+
+    # intersect starting from the smallest set
+    matching_sets.sort(key=len)
+    return matching_sets[0].intersection(*matching_sets[1:])
+
+
+if __name__ == '__main__':
+  tile_1 = Tile(
+    north=None,
+    east=Connection(color=Color.RED, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.PURPLE, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  tile_2 = Tile(
+    north=None,
+    east=Connection(color=Color.PURPLE, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.YELLOW, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  edge_index = EdgeIndex(tiles=[tile_1, tile_2])
+  assert len(edge_index.available) == 8
+  assert edge_index.candidates(required_codes=(None, None, None, None)) == edge_index.available
+  # a cell west of tile_1 needs a purple tail facing east
+  purple_tail_east = Connection.MATING_EDGES[tile_1.west.code]
+  assert edge_index.candidates(required_codes=(None, purple_tail_east, None, None)) == {(1, 0)}
+  assert edge_index.candidates(required_codes=(Connection.NO_EDGE, purple_tail_east, Connection.NO_EDGE, None)) == {(1, 0)}
+  assert edge_index.candidates(required_codes=(None, purple_tail_east, Connection.NO_EDGE, Connection.NO_EDGE)) == set()
+  # placed tiles are no longer candidates
+  edge_index.discard(tile_idx=1)
+  assert edge_index.candidates(required_codes=(None, purple_tail_east, None, None)) == set()
+  assert len(edge_index.available) == 4
+  edge_index.add(tile_idx=1)
+  assert edge_index.candidates(required_codes=(None, purple_tail_east, None, None)) == {(1, 0)}
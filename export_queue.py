@@ -0,0 +1,118 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, List, Set, Tuple
+import threading
+
+from enums import Color, Connector, Direction
+from connection import Connection
+from tile import Tile, PlacedTile
+from board import Board
+from puzzle_board_viewer import view_board
+
+
+class ExportQueue:
+  # renders and saves solutions on background threads while the search goes on
+  # at most max_pending solutions wait to be rendered, submit blocks until one is done beyond that
+  DEFAULT_MAX_PENDING = 8
+
+  def __init__(self, workers: int = 1, max_pending: int = DEFAULT_MAX_PENDING, render: Callable[[Board, str], None] = view_board):
+    self._executor = ThreadPoolExecutor(max_workers=workers)
+    self._slots = threading.BoundedSemaphore(value=max_pending)
+    self._render = render
+    self._seen_keys: Set[Hashable] = set()
+    self._errors: List[BaseException] = []
+    self._exported = 0
+    self._lock = threading.Lock()
+
+  @property
+  def exported(self) -> int:
+    return self._exported
+
+  def submit(self, key: Hashable, moves: List, output_file: str = None) -> bool:
+    # moves are anything with tile, rotation_count and coord, e.g. Puzzle.Move
+    # a key seen before, e.g. the canonical form of a solution already exported, is skipped
+    if key in self._seen_keys:
+      return False
+    self._seen_keys.add(key)
+
+    # the search keeps changing its board, the worker gets one of its own
+    board = snapshot_board(placements=[(move.tile, move.rotation_count, move.coord) for move in moves])
+    self._slots.acquire()
+    future = self._executor.submit(self._render, board, output_file)
+    future.add_done_callback(self._on_done)
+    return True
+
+  def _on_done(self, future: Future) -> None:
+    with self._lock:
+      if future.exception() is not None:
+        self._errors.append(future.exception())
+      else:
+        self._exported += 1
+    self._slots.release()
+
+  def close(self) -> None:
+    # waits for every submitted solution, raises the first failed export
+    self._executor.shutdown(wait=True)
+    if len(self._errors) > 0:
+      raise self._errors[0]
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    self.close()
+
+
+def snapshot_board(placements: List[Tuple[Tile, int, Tuple[int, int]]]) -> Board:
+  # a board of its own with the (tile, rotation count, coord) placements
+  board = Board()
+  for (tile, rotation_count, coord) in placements:
+    board[coord] = PlacedTile(tile=tile, rotation_count=rotation_count)
+
+  return board
+
+
+if __name__ == '__main__':
+  tile_1 = Tile(
+    north=None,
+    east=Connection(color=Color.RED, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.PURPLE, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  tile_2 = Tile(
+    north=None,
+    east=Connection(color=Color.PURPLE, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.YELLOW, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  class Placement:
+    def __init__(self, tile: Tile, rotation_count: int, coord: Tuple[int, int]):
+      (self.tile, self.rotation_count, self.coord) = (tile, rotation_count, coord)
+
+  rendered = []
+  release_render = threading.Event()
+
+  def render(board: Board, output_file: str) -> None:
+    release_render.wait()
+    rendered.append((output_file, {coord: (placed_tile.rotation_count, placed_tile.north) for coord, placed_tile in board.items()}))
+
+  export_queue = ExportQueue(max_pending=1, render=render)
+  moves = [Placement(tile=tile_1, rotation_count=1, coord=(0, 0))]
+  assert export_queue.submit(key='a', moves=moves, output_file='a.png') is True
+  # changing the moves after the submit leaves the exported board alone
+  moves.append(Placement(tile=tile_2, rotation_count=0, coord=(0, 1)))
+  # the same solution again is skipped without blocking
+  assert export_queue.submit(key='a', moves=[Placement(tile=tile_1, rotation_count=1, coord=(0, 0))], output_file='a.png') is False
+  # a second one has to wait for the render in flight
+  second_submit = threading.Thread(target=export_queue.submit, kwargs={'key': 'b', 'moves': [Placement(tile=tile_2, rotation_count=0, coord=(0, 0))], 'output_file': 'b.png'})
+  second_submit.start()
+  second_submit.join(timeout=0.2)
+  assert second_submit.is_alive()
+  release_render.set()
+  second_submit.join()
+  # everything submitted is rendered once the queue is closed
+  with export_queue:
+    pass
+  assert export_queue.exported == 2
+  assert rendered == [('a.png', {(0, 0): (1, tile_1.orientation(rotation_count=1)[0])}), ('b.png', {(0, 0): (0, None)})]
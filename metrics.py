@@ -0,0 +1,69 @@
+from typing import Dict
+import json
+
+
+class SearchMetrics:
+  # counters of the searches run by a puzzle, searches without metrics skip all of this behind a single None check
+  # verbose also prints what the DEBUG environment variable used to print
+  def __init__(self, verbose: bool = False):
+    self._verbose = verbose
+    self.nodes_expanded = 0
+    self.can_place_tile_calls = 0
+    self.dead_coords = 0
+    self.solutions = 0
+    # depth: seconds spent with that many moves made
+    self._depth_seconds: Dict[int, float] = {}
+
+  @property
+  def verbose(self) -> bool:
+    return self._verbose
+
+  @property
+  def depth_seconds(self) -> Dict[int, float]:
+    return self._depth_seconds
+
+  def add_depth_time(self, depth: int, seconds: float) -> None:
+    self._depth_seconds[depth] = self._depth_seconds.get(depth, 0.0) + seconds
+
+  def log(self, message: str) -> None:
+    if self._verbose:
+      print(message)
+
+  def to_dict(self) -> Dict:
+    return {
+      'nodes_expanded': self.nodes_expanded,
+      'can_place_tile_calls': self.can_place_tile_calls,
+      'dead_coords': self.dead_coords,
+      'solutions': self.solutions,
+      'depth_seconds': dict(sorted(self._depth_seconds.items())),
+    }
+
+  def merge(self, counters: Dict) -> None:
+    # adds the to_dict() counters of another search, e.g. one run in another process
+    self.nodes_expanded += counters['nodes_expanded']
+    self.can_place_tile_calls += counters['can_place_tile_calls']
+    self.dead_coords += counters['dead_coords']
+    self.solutions += counters['solutions']
+    for depth, seconds in counters['depth_seconds'].items():
+      self.add_depth_time(depth=int(depth), seconds=seconds)
+
+  def to_json(self, output_file: str = None) -> str:
+    dumped = json.dumps(self.to_dict(), indent=2)
+    if output_file is not None:
+      with open(output_file, 'w') as metrics_file:
+        metrics_file.write(dumped)
+
+    return dumped
+
+
+if __name__ == '__main__':
+  metrics = SearchMetrics()
+  metrics.nodes_expanded += 3
+  metrics.solutions += 1
+  metrics.add_depth_time(depth=2, seconds=0.5)
+  metrics.add_depth_time(depth=2, seconds=0.25)
+  assert metrics.depth_seconds == {2: 0.75}
+  other = SearchMetrics()
+  other.merge(counters=json.loads(metrics.to_json()))
+  other.merge(counters=metrics.to_dict())
+  assert other.to_dict() == {'nodes_expanded': 6, 'can_place_tile_calls': 0, 'dead_coords': 0, 'solutions': 2, 'depth_seconds': {2: 1.5}}
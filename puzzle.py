@@ -1,15 +1,26 @@
 from __future__ import annotations
 
-from typing import Dict, List, Set, Tuple
+from typing import Any, Dict, Iterator, List, Set, Tuple
+import heapq
+import multiprocessing
 import random
 import os
+import time
+from contextlib import nullcontext
 from pathlib import Path
 
 from enums import Color, Direction, Connector
 from connection import Connection
-from tile import Tile
+from tile import Tile, PlacedTile
+from board import Board
+from edge_index import EdgeIndex
+from batch_scorer import BatchScorer
+from transposition import TranspositionTable, zobrist_key
+from metrics import SearchMetrics
+from checkpoint import SearchCheckpoint
 
-from puzzle_board_viewer import view_board
+from export_queue import ExportQueue
+from solution_store import SolutionReader, SolutionWriter
 
 
 class Puzzle:
@@ -57,6 +68,15 @@ class Puzzle:
 
   DEBUG_FLAG = 'DEBUG'
 
+  # nodes searched between looks at the clock
+  DEADLINE_CHECK_NODES = 256
+  # seconds between the progress reports of a checkpointed exhaustive search, about the most a terminated one searches again
+  PROGRESS_INTERVAL = 1.0
+
+  # boards waiting in the deepest first heap, and boards it expands from each first tile before giving up
+  DEEPEST_FIRST_MAX_OPEN = 4096
+  DEEPEST_FIRST_MAX_NODES = 20000
+
   @classmethod
   def neighboring_coords(cls, coord: Tuple[int, int]) -> List[Tuple[int, int]]:
     coord_row = coord[0]
@@ -70,25 +90,41 @@ class Puzzle:
 
     return [north_coord, east_coord, south_coord, west_coord]
 
-  def __init__(self, tiles: List[Tile] = None, placed: Dict[str, Tuple[int, int]] = None, board: List[List[Tile]] = None, filled_coords: Set[Tuple[int, int]] = None, allowed_coords: Set[Tuple[int, int]] = None):
-    # tile repr: tile obj
+  def __init__(self, tiles: List[Tile] = None, placed: Dict[int, Tuple[int, int]] = None, board: Board = None, filled_coords: Set[Tuple[int, int]] = None, allowed_coords: Set[Tuple[int, int]] = None):
+    # tile position: coord, positions in the tiles list
     self._tiles = tiles or []
     self._placed = placed or {}
-    # board is 40 x 40
-    self._board = board or [[None for _ in range(0, 41)] for _ in range(0, 41)]
+    # bit tile position is set for every placed tile
+    self._placed_mask = sum(1 << tile_id for tile_id in self._placed)
+    # sparse board, grows as far as the tiles go
+    self._board = board if board is not None else Board()
     self._filled_coords = filled_coords or set()
     self._allowed_coords = allowed_coords or set()
+    # coords left empty for good by the backtracking search
+    self._blocked_coords = set()
+    # (coord, tile or None when blocked, was allowed, opened coords) for every change that can be undone
+    self._trail = []
+    # (trail length, coord) of the coords next_moves dropped for being dead, put back once that trail entry is undone
+    self._dead_trail: List[Tuple[int, Tuple[int, int]]] = []
+    # zobrist hash of the placed tiles and blocked coords relative to the anchor coord, None until first asked for
+    self._zobrist = 0
+    self._zobrist_anchor = None
+    self._build_edge_index()
+    self._invalidate_frontier()
+    self._transposition_stats = {}
+    # the environment is only looked at once, the searches just check for None
+    self._metrics = SearchMetrics(verbose=True) if os.environ.get(Puzzle.DEBUG_FLAG) is not None else None
 
   @property
   def tiles(self) -> List[Tile]:
     return self._tiles
 
   @property
-  def placed_tiles(self) -> Dict[str, Tuple[int, int]]:
+  def placed_tiles(self) -> Dict[int, Tuple[int, int]]:
     return self._placed
 
   @property
-  def board(self) -> List[List[Tile]]:
+  def board(self) -> Board:
     return self._board
 
   @property
@@ -99,7 +135,18 @@ class Puzzle:
   def allowed_coords(self) -> Set[Tuple[int, int]]:
     return self._allowed_coords
 
-  def _connection_score(self, connection_1: Connection, connection_2: Connection) -> int:
+  @property
+  def metrics(self) -> SearchMetrics:
+    # None unless enabled
+    return self._metrics
+
+  def enable_metrics(self, verbose: bool = False) -> SearchMetrics:
+    # counts what the following searches do, verbose prints their progress too
+    self._metrics = SearchMetrics(verbose=verbose)
+    return self._metrics
+
+  @classmethod
+  def _connection_score(cls, connection_1: Connection, connection_2: Connection) -> int:
     if connection_1 is None or \
       connection_2 is None or \
       (connection_1.connector is None and connection_2.connector is None):
@@ -111,21 +158,262 @@ class Puzzle:
     if connection_1.connector == Connector.ROAD and connection_2.connector == Connector.ROAD:
       return Puzzle.ROAD_ROAD_SCORE
 
-  def _update_allowed_coords(self, tile: Tile, coord: Tuple[int, int]) -> None:
-    # potential empty coords surrounding the tile in the placed coord
-    [north_coord, east_coord, south_coord, west_coord] = Puzzle.neighboring_coords(coord=coord)
-    # check if all 4 potential coords are filled or still open
-    if north_coord not in self._filled_coords and self.board_content(coord=north_coord) is None:
-      self._allowed_coords.add(north_coord)
+  @classmethod
+  def _edge_scores_table(cls) -> Tuple[Tuple[int, ...], ...]:
+    # _EDGE_SCORES[neighbor_code][tile_code] is the connection score, 0 if the edges cannot face each other
+    table = []
+    for code_1 in range(0, Connection.EDGE_CODE_COUNT):
+      row = []
+      for code_2 in range(0, Connection.EDGE_CODE_COUNT):
+        if Connection.is_compatible_code(code_1=code_1, code_2=code_2):
+          row.append(cls._connection_score(connection_1=Connection.from_code(code=code_1), connection_2=Connection.from_code(code=code_2)))
+        else:
+          row.append(0)
+      table.append(tuple(row))
+
+    return tuple(table)
+
+  def _build_edge_index(self) -> None:
+    # tile: position in the tiles list, kept here since the tiles may be shared with other puzzles
+    self._tile_positions: Dict[Tile, int] = {tile: tile_idx for tile_idx, tile in enumerate(self._tiles)}
+    # the edge index only holds tiles not placed yet
+    self._edge_index = EdgeIndex(tiles=self._tiles)
+    # built on the first vectorized next_moves
+    self._batch_scorer: BatchScorer = None
+    for tile_id in self._placed:
+      self._edge_index.discard(tile_idx=tile_id)
+
+  def _coord_requirements(self, coord: Tuple[int, int], closed: bool = False) -> Tuple[Tuple[int, int, int, int], int]:
+    # the edge code each side of the coord must have, None when anything goes, and the score of any tile fitting them
+    # closed searches treat blocked coords and coords before the first tile as walls that no edge may face
+    required_codes = [None, None, None, None]
+    score = 1
+
+    for side, neighbor_coord in enumerate(Puzzle.neighboring_coords(coord=coord)):
+      neighbor = self.board_content(coord=neighbor_coord)
+      if neighbor is not None:
+        neighbor_code = neighbor.edge_codes[(side + 2) % 4]
+        required_codes[side] = Connection.MATING_EDGES[neighbor_code]
+        score *= Puzzle._EDGE_SCORES[neighbor_code][required_codes[side]]
+      elif closed and (neighbor_coord in self._blocked_coords or neighbor_coord < Puzzle.FIRST_TILE_COORD):
+        required_codes[side] = Connection.NO_EDGE
+
+    return (tuple(required_codes), score)
+
+  @classmethod
+  def _must_fill(cls, required_codes: Tuple[int, int, int, int]) -> bool:
+    # a neighbor has an edge facing the coord
+    return any(code is not None and code != Connection.NO_EDGE for code in required_codes)
+
+  def _fitting_tiles(self, required_codes: Tuple[int, int, int, int], allow_rotation: bool, distinct_options: Dict[Tuple[int, int], int] = None) -> List[Tuple[Tile, int]]:
+    # (tile, rotation_count) of the tiles left with the required edges, only the distinct options when given
+    candidates = self._edge_index.candidates(required_codes=required_codes)
+    return [(self._tiles[tile_idx], rotation_count) for (tile_idx, rotation_count) in sorted(candidates) if (allow_rotation or rotation_count == 0) and (distinct_options is None or self._is_distinct_option(option=(tile_idx, rotation_count), distinct_options=distinct_options))]
 
-    if east_coord not in self._filled_coords and self.board_content(coord=east_coord) is None:
-      self._allowed_coords.add(east_coord)
+  def _is_distinct_option(self, option: Tuple[int, int], distinct_options: Dict[Tuple[int, int], int]) -> bool:
+    # the option is distinct once the identical tiles before it are placed
+    earlier_mask = distinct_options.get(option)
+    return earlier_mask is not None and self._placed_mask & earlier_mask == earlier_mask
 
-    if south_coord not in self._filled_coords and self.board_content(coord=south_coord) is None:
-      self._allowed_coords.add(south_coord)
+  def _coord_candidates(self, coord: Tuple[int, int], allow_rotation: bool) -> Tuple[int, List[Tuple[Tile, int]]]:
+    # every tile fitting the coord scores the same since the score only depends on the occupied neighbors
+    (required_codes, score) = self._coord_requirements(coord=coord)
+    fitting_tiles = self._fitting_tiles(required_codes=required_codes, allow_rotation=allow_rotation)
 
-    if west_coord not in self._filled_coords and self.board_content(coord=west_coord) is None:
-      self._allowed_coords.add(west_coord)
+    return (score if len(fitting_tiles) > 0 else 0, fitting_tiles)
+
+  @classmethod
+  def canonical_form(cls, moves: List[Move]) -> Tuple[Tuple[int, int, Tuple[int, int, int, int]], ...]:
+    # the same layout shifted or turned by quarter turns shares the canonical form, tiles are compared by their edges
+    # so swapping 2 identical tiles gives the same form too. mirrored layouts would need mirrored tiles, hence only turns
+    forms = []
+    for quarter_turns in range(0, 4):
+      cells = []
+      for move in moves:
+        (row, col) = move.coord
+        for _ in range(0, quarter_turns):
+          # turning the board clockwise moves north to east
+          (row, col) = (col, -row)
+        cells.append((row, col, move.tile.orientation_codes(rotation_count=move.rotation_count + quarter_turns)))
+
+      min_row = min(row for (row, _, _) in cells)
+      min_col = min(col for (_, col, _) in cells)
+      forms.append(tuple(sorted((row - min_row, col - min_col, codes) for (row, col, codes) in cells)))
+
+    return min(forms)
+
+  def _update_allowed_coords(self, tile: Tile, coord: Tuple[int, int]) -> List[Tuple[int, int]]:
+    # potential empty coords surrounding the tile in the placed coord, returns the newly allowed ones
+    opened_coords = []
+    for neighbor_coord in Puzzle.neighboring_coords(coord=coord):
+      if neighbor_coord not in self._filled_coords and \
+        neighbor_coord not in self._allowed_coords and \
+        neighbor_coord not in self._blocked_coords and \
+        self.board_content(coord=neighbor_coord) is None:
+        self._allowed_coords.add(neighbor_coord)
+        opened_coords.append(neighbor_coord)
+
+    return opened_coords
+
+  # zobrist feature of a blocked coord, edge codes are never negative
+  BLOCKED_FEATURE = (-1,)
+
+  @property
+  def state_hash(self) -> int:
+    # the same tiles in the same rotations at the same coords hash the same, wherever the board is shifted to
+    top_left = None if len(self._board) == 0 else self._board.bounding_box[0]
+    if top_left != self._zobrist_anchor:
+      self._zobrist_anchor = top_left
+      self._zobrist = 0
+      if top_left is not None:
+        for coord, placed_tile in self._board.items():
+          self._zobrist ^= self._zobrist_feature_key(codes=placed_tile.edge_codes, coord=coord)
+        for coord in self._blocked_coords:
+          self._zobrist ^= self._zobrist_feature_key(codes=Puzzle.BLOCKED_FEATURE, coord=coord)
+
+    return self._zobrist
+
+  def _zobrist_feature_key(self, codes: Tuple[int, ...], coord: Tuple[int, int]) -> int:
+    return zobrist_key(feature=(codes, coord[0] - self._zobrist_anchor[0], coord[1] - self._zobrist_anchor[1]))
+
+  def placed_moves(self) -> List[Move]:
+    # the moves on the board in the order they were made
+    return [Puzzle.Move(tile=tile, rotation_count=self._board[coord].rotation_count, coord=coord) for (coord, tile, _, _) in self._trail if tile is not None]
+
+  def _push_tile(self, tile: Tile, rotation_count: int, coord: Tuple[int, int]) -> None:
+    # place without any checks and record the change on the trail, the rotation stays with the placement
+    placed_tile = PlacedTile(tile=tile, rotation_count=rotation_count)
+    self._board[coord] = placed_tile
+    tile_idx = self._tile_positions[tile]
+    self._placed[tile_idx] = coord
+    self._placed_mask |= 1 << tile_idx
+    self._filled_coords.add(coord)
+    was_allowed = coord in self._allowed_coords
+    self._allowed_coords.discard(coord)
+    self._edge_index.discard(tile_idx=tile_idx)
+    self._trail.append((coord, tile, was_allowed, self._update_allowed_coords(tile=tile, coord=coord)))
+    self._update_frontier(tile=tile, coord=coord)
+    if self._zobrist_anchor is not None:
+      self._zobrist ^= self._zobrist_feature_key(codes=placed_tile.edge_codes, coord=coord)
+
+  def _push_blocked(self, coord: Tuple[int, int]) -> None:
+    # leave the coord empty for the rest of the branch
+    self._allowed_coords.discard(coord)
+    self._blocked_coords.add(coord)
+    self._trail.append((coord, None, True, []))
+    if self._zobrist_anchor is not None:
+      self._zobrist ^= self._zobrist_feature_key(codes=Puzzle.BLOCKED_FEATURE, coord=coord)
+
+  def undo(self) -> None:
+    # revert the latest placement (or blocked coord) on the trail
+    # coords found dead on top of it may fit a tile again, the ones it opened go away again below
+    while len(self._dead_trail) > 0 and self._dead_trail[-1][0] >= len(self._trail):
+      self._allowed_coords.add(self._dead_trail.pop()[1])
+    (coord, tile, was_allowed, opened_coords) = self._trail.pop()
+    # next_moves may have dropped an opened coord already for being dead
+    for opened_coord in opened_coords:
+      self._allowed_coords.discard(opened_coord)
+
+    if self._zobrist_anchor is not None:
+      self._zobrist ^= self._zobrist_feature_key(codes=Puzzle.BLOCKED_FEATURE if tile is None else self._board[coord].edge_codes, coord=coord)
+
+    if tile is None:
+      self._blocked_coords.remove(coord)
+    else:
+      del self._board[coord]
+      tile_idx = self._tile_positions[tile]
+      del self._placed[tile_idx]
+      self._placed_mask ^= 1 << tile_idx
+      self._filled_coords.remove(coord)
+      self._edge_index.add(tile_idx=tile_idx)
+
+    if was_allowed:
+      self._allowed_coords.add(coord)
+
+    # a tile back in play may fit anywhere, the frontier is rescored from scratch when needed
+    self._frontier_stale = True
+
+  def _invalidate_frontier(self) -> None:
+    # coord: (score, fitting (tile, rotation_count) list) of the frontier coords scored by next_moves, the list keeps
+    # tiles placed since and is filtered when read
+    self._frontier_cache: Dict[Tuple[int, int], Tuple[int, List[Tuple[Tile, int]]]] = {}
+    # coord: how many of its cached fitting tiles are not placed yet
+    self._frontier_live: Dict[Tuple[int, int], int] = {}
+    # (-score, coord) of the scored coords, entries no longer matching the cache are skipped
+    self._frontier_heap: List[Tuple[int, Tuple[int, int]]] = []
+    # tile: {coord: how many times the cached fitting tiles of the coord include the tile}
+    self._frontier_tiles: Dict[Tile, Dict[Tuple[int, int], int]] = {}
+    # coords to rescore and coords found with no fitting tile
+    self._frontier_dirty: Set[Tuple[int, int]] = set(self._allowed_coords)
+    self._frontier_dead: Set[Tuple[int, int]] = set()
+    self._frontier_rotation = None
+    self._frontier_stale = False
+
+  def _forget_frontier_coord(self, coord: Tuple[int, int]) -> None:
+    cached = self._frontier_cache.pop(coord, None)
+    if cached is not None:
+      del self._frontier_live[coord]
+      for (tile, _) in cached[1]:
+        tile_coords = self._frontier_tiles.get(tile)
+        if tile_coords is not None:
+          tile_coords.pop(coord, None)
+
+  def _rescore_frontier_coord(self, coord: Tuple[int, int]) -> None:
+    (score, fitting_tiles) = self._coord_candidates(coord=coord, allow_rotation=self._frontier_rotation)
+    self._cache_frontier_coord(coord=coord, score=score, fitting_tiles=fitting_tiles)
+
+  def _rescore_frontier_coords(self, coords: List[Tuple[int, int]]) -> None:
+    # every coord against every tile orientation in one go
+    if len(coords) == 0:
+      return
+
+    if self._batch_scorer is None or self._batch_scorer.tile_count != len(self._tiles):
+      self._batch_scorer = BatchScorer(tiles=self._tiles, edge_scores=Puzzle._EDGE_SCORES)
+
+    neighbor_codes = []
+    for coord in coords:
+      codes = []
+      for side, neighbor_coord in enumerate(Puzzle.neighboring_coords(coord=coord)):
+        neighbor = self._board.get(neighbor_coord)
+        codes.append(BatchScorer.OPEN if neighbor is None else neighbor.edge_codes[(side + 2) % 4])
+      neighbor_codes.append(codes)
+
+    fitting = self._batch_scorer.fitting(neighbor_codes=neighbor_codes, available=self._edge_index.available, allow_rotation=self._frontier_rotation)
+    for coord, (score, fitting_orientations) in zip(coords, fitting):
+      fitting_tiles = [(self._tiles[tile_idx], rotation_count) for (tile_idx, rotation_count) in fitting_orientations]
+      self._cache_frontier_coord(coord=coord, score=score, fitting_tiles=fitting_tiles)
+
+  def _cache_frontier_coord(self, coord: Tuple[int, int], score: int, fitting_tiles: List[Tuple[Tile, int]]) -> None:
+    self._forget_frontier_coord(coord=coord)
+    self._frontier_cache[coord] = (score, fitting_tiles)
+    self._frontier_live[coord] = len(fitting_tiles)
+    for (tile, _) in fitting_tiles:
+      tile_coords = self._frontier_tiles.setdefault(tile, {})
+      tile_coords[coord] = tile_coords.get(coord, 0) + 1
+
+    if score > 0:
+      heapq.heappush(self._frontier_heap, (-score, coord))
+    else:
+      self._frontier_dead.add(coord)
+
+  def _update_frontier(self, tile: Tile, coord: Tuple[int, int]) -> None:
+    # only the neighbors of the placed tile change their constraints
+    if self._frontier_stale:
+      return
+
+    self._forget_frontier_coord(coord=coord)
+    self._frontier_dirty.discard(coord)
+    for neighbor_coord in Puzzle.neighboring_coords(coord=coord):
+      if neighbor_coord in self._allowed_coords:
+        self._frontier_dirty.add(neighbor_coord)
+
+    # the placed tile no longer fits anywhere else, the scores stay the same unless no tile is left
+    # the cached lists are left alone, only the counts of the coords that held the tile change
+    for other_coord, entries in self._frontier_tiles.pop(tile, {}).items():
+      self._frontier_live[other_coord] -= entries
+      if self._frontier_live[other_coord] == 0:
+        self._frontier_cache[other_coord] = (0, [])
+        self._frontier_dead.add(other_coord)
 
   def _place_first_tile(self, tile: Tile = None) -> None:
     first_tile = tile
@@ -133,210 +421,917 @@ class Puzzle:
       first_tile_idx = random.randrange(0, len(self._tiles), 1)
       first_tile = self._tiles[first_tile_idx]
 
-    self._board[Puzzle.FIRST_TILE_COORD[0]][Puzzle.FIRST_TILE_COORD[1]] = first_tile
-    self._placed[first_tile.id] = Puzzle.FIRST_TILE_COORD
-    self._filled_coords.add(Puzzle.FIRST_TILE_COORD)
-    self._update_allowed_coords(tile=first_tile, coord=Puzzle.FIRST_TILE_COORD)
+    self._push_tile(tile=first_tile, rotation_count=0, coord=Puzzle.FIRST_TILE_COORD)
 
   def add_tile(self, tile: Tile) -> None:
     self._tiles.append(tile)
+    self._tile_positions[tile] = len(self._tiles) - 1
+    self._edge_index.add(tile_idx=len(self._tiles) - 1)
 
-  def board_content(self, coord: Tuple[int, int]) -> Tile:
-    return self._board[coord[0]][coord[1]]
+  def board_content(self, coord: Tuple[int, int]) -> PlacedTile:
+    return self._board.get(coord)
 
   def reset(self) -> None:
     self._placed.clear()
-    # board is 40 x 40
-    self._board = [[None for _ in range(0, 41)] for _ in range(0, 41)]
+    self._placed_mask = 0
+    self._board.clear()
     self._filled_coords.clear()
     self._allowed_coords = {Puzzle.FIRST_TILE_COORD}
+    self._blocked_coords.clear()
+    self._trail.clear()
+    self._dead_trail.clear()
+    self._zobrist = 0
+    self._zobrist_anchor = None
+    self._build_edge_index()
+    self._invalidate_frontier()
 
   def remaining_tiles(self) -> List[Tile]:
-    return list(filter(lambda t: t.id not in self.placed_tiles, self.tiles))
-
-  def can_place_tile(self, tile: Tile, coord: Tuple[int, int]) -> Tuple[bool, int]:
-    # check if the tile can be placed by ALL connections
-    [north_coord, east_coord, south_coord, west_coord] = Puzzle.neighboring_coords(coord=coord)
-    [north_score, east_score, south_score, west_score] = [0, 0, 0, 0]
-
-    north_neighbor = self.board_content(coord=north_coord)
-    can_connect_north = north_neighbor is None or north_neighbor.can_connect(self_edge=north_neighbor.south, tile=tile, tile_edge=tile.north)
-    if can_connect_north:
-      north_score = self._connection_score(connection_1=None if north_neighbor is None else north_neighbor.south, connection_2=tile.north)
-
-    east_neighbor = self.board_content(coord=east_coord)
-    can_connect_east = east_neighbor is None or east_neighbor.can_connect(self_edge=east_neighbor.west, tile=tile, tile_edge=tile.east)
-    if can_connect_east:
-      east_score = self._connection_score(connection_1=None if east_neighbor is None else east_neighbor.west, connection_2=tile.east)
-
-    south_neighbor = self.board_content(coord=south_coord)
-    can_connect_south = south_neighbor is None or south_neighbor.can_connect(self_edge=south_neighbor.north, tile=tile, tile_edge=tile.south)
-    if can_connect_south:
-      south_score = self._connection_score(connection_1=None if south_neighbor is None else south_neighbor.north, connection_2=tile.south)
-
-    west_neighbor = self.board_content(coord=west_coord)
-    can_connect_west = west_neighbor is None or west_neighbor.can_connect(self_edge=west_neighbor.east, tile=tile, tile_edge=tile.west)
-    if can_connect_west:
-      west_score = self._connection_score(connection_1=None if west_neighbor is None else west_neighbor.east, connection_2=tile.west)
-
-    return (
-      can_connect_north and can_connect_east and can_connect_south and can_connect_west,
-      north_score * east_score * south_score * west_score,
-    )
+    # only walks the bits of the tiles left, lowest id first
+    remaining = []
+    remaining_mask = ((1 << len(self._tiles)) - 1) ^ self._placed_mask
+    while remaining_mask != 0:
+      lowest_bit = remaining_mask & -remaining_mask
+      remaining.append(self._tiles[lowest_bit.bit_length() - 1])
+      remaining_mask ^= lowest_bit
+
+    return remaining
+
+  def can_place_tile(self, tile: Tile, coord: Tuple[int, int], rotation_count: int = 0) -> Tuple[bool, int]:
+    # check if the tile can be placed by ALL connections, defaults to the tile unrotated
+    if self._metrics is not None:
+      self._metrics.can_place_tile_calls += 1
+    (tile_north, tile_east, tile_south, tile_west) = tile.orientation_codes(rotation_count=rotation_count)
+    (coord_row, coord_col) = coord
+    board_content = self._board.get
+    edge_scores = Puzzle._EDGE_SCORES
+    # an empty neighbor accepts any edge with a None - None score
+    score = 1
+
+    north_neighbor = board_content((coord_row - 1, coord_col))
+    if north_neighbor is not None:
+      score *= edge_scores[north_neighbor.edge_codes[2]][tile_north]
+
+    east_neighbor = board_content((coord_row, coord_col + 1))
+    if east_neighbor is not None:
+      score *= edge_scores[east_neighbor.edge_codes[3]][tile_east]
+
+    south_neighbor = board_content((coord_row + 1, coord_col))
+    if south_neighbor is not None:
+      score *= edge_scores[south_neighbor.edge_codes[0]][tile_south]
+
+    west_neighbor = board_content((coord_row, coord_col - 1))
+    if west_neighbor is not None:
+      score *= edge_scores[west_neighbor.edge_codes[1]][tile_west]
+
+    return (score != 0, score)
 
   def place_tile(self, tile: Tile, rotation_count: int, coord: Tuple[int, int]) -> bool:
     # make sure coord is one of the allowed moves
-    coord_row = coord[0]
-    coord_col = coord[1]
-
     if coord not in self._allowed_coords:
-      if os.environ.get(Puzzle.DEBUG_FLAG) is not None:
-        print(f"cannot place tile at coordinate {coord}")
+      if self._metrics is not None:
+        self._metrics.log(f"cannot place tile at coordinate {coord}")
       return False
     elif coord in self._filled_coords:
-      if os.environ.get(Puzzle.DEBUG_FLAG) is not None:
-        print(f"coordinate {coord} is already occupied")
+      if self._metrics is not None:
+        self._metrics.log(f"coordinate {coord} is already occupied")
       return False
     else:
       # the below assert should not fail if board and other indices are kept in sync
-      assert self._board[coord_row][coord_col] is None
-      # make sure the tile is in the right orientation
-      tile.reset()
-      for _ in range(0, rotation_count):
-        tile.rotate()
-      # check if the tile can be placed
-      if self.can_place_tile(tile=tile, coord=coord)[0] is True:
-        # update board
-        self._board[coord_row][coord_col] = tile
-        self._placed[tile.id] = coord
-        # update indices
-        if coord in self._allowed_coords:
-          self._allowed_coords.remove(coord)
-
-        self._filled_coords.add(coord)
-        self._update_allowed_coords(tile=tile, coord=coord)
+      assert coord not in self._board
+      # check if the tile can be placed in the requested orientation
+      if self.can_place_tile(tile=tile, coord=coord, rotation_count=rotation_count)[0] is True:
+        # update board and indices
+        self._push_tile(tile=tile, rotation_count=rotation_count, coord=coord)
 
         return True
 
-  def next_moves(self, allow_rotation: bool = False) -> Tuple[int, List[Move]]:
+  def next_moves(self, allow_rotation: bool = False, vectorized: bool = False) -> Tuple[int, List[Move]]:
+    # vectorized scores the frontier with numpy when it is installed
     tiles_remaining = len(self.tiles) - len(self.placed_tiles)
-    if os.environ.get(Puzzle.DEBUG_FLAG) is not None:
-      print(f"🦀 remaining tiles {tiles_remaining}, allowed coords {len(self.allowed_coords)}")
+    metrics = self._metrics
+    if metrics is not None:
+      metrics.log(f"🦀 remaining tiles {tiles_remaining}, allowed coords {len(self.allowed_coords)}")
     # successfully completed
     if tiles_remaining == 0:
-      print(f"🏅 success! - {tiles_remaining}")
+      if metrics is not None:
+        metrics.log(f"🏅 success! - {tiles_remaining}")
       return (-1, [])
     elif len(self.allowed_coords) == 0:
-      print(f"👻 no more moves possible - {tiles_remaining}")
+      if metrics is not None:
+        metrics.log(f"👻 no more moves possible - {tiles_remaining}")
       return (-2, [])
     else:
-      allowed_coords_copy = self.allowed_coords.copy()
-      placed_copy = self.placed_tiles.copy()
-      max_score_all_possible_coords = 0
-      coord_scores = {}
-      moves = []
-
-      for possible_coord in allowed_coords_copy:
-        # a list of tuple (tile, rotation_count)
-        max_scoring_tiles: List[Tuple[Tile, int]] = []
-        max_score = 0
-
-        for tile in self.tiles:
-          if tile.id not in placed_copy:
-            spins = [0, 1, 2, 3] if allow_rotation else [0]
-            for spin in spins:
-              tile.reset()
-
-              for _ in '.' * spin:
-                tile.rotate()
-
-              (possible, score) = self.can_place_tile(tile=tile, coord=possible_coord)
-              if possible:
-                if score == max_score:
-                  max_scoring_tiles.append((tile, tile.rotation_count))
-                elif score > max_score:
-                  max_score = score
-                  max_scoring_tiles = [(tile, tile.rotation_count)]
-
-        if max_score > max_score_all_possible_coords:
-          # replace the score and moves
-          max_score_all_possible_coords = max_score
-          moves.clear()
-
-          for max_scoring_tile, tile_rotation_count in max_scoring_tiles:
-            # add to moves
-            attempting_move = Puzzle.Move(tile=max_scoring_tile, rotation_count=tile_rotation_count, coord=possible_coord)
-            moves.append(attempting_move)
-        elif max_score == max_score_all_possible_coords:
-          for max_scoring_tile, tile_rotation_count in max_scoring_tiles:
-            # add to moves
-            attempting_move = Puzzle.Move(tile=max_scoring_tile, rotation_count=tile_rotation_count, coord=possible_coord)
-            moves.append(attempting_move)
-        # debugging purposes
-        coord_scores[possible_coord] = max_score
-
-        if len(max_scoring_tiles) == 0:
+      if self._frontier_stale or self._frontier_rotation != allow_rotation:
+        self._invalidate_frontier()
+        self._frontier_rotation = allow_rotation
+
+      # only coords next to the latest placements get rescored
+      if vectorized and BatchScorer.is_supported():
+        self._rescore_frontier_coords(coords=[dirty_coord for dirty_coord in self._frontier_dirty if dirty_coord in self._allowed_coords])
+      else:
+        for dirty_coord in self._frontier_dirty:
+          if dirty_coord in self._allowed_coords:
+            self._rescore_frontier_coord(coord=dirty_coord)
+      self._frontier_dirty.clear()
+
+      for dead_coord in self._frontier_dead:
+        if dead_coord in self._allowed_coords:
           # no tiles can fit
-          self.allowed_coords.remove(possible_coord)
-          if os.environ.get(Puzzle.DEBUG_FLAG) is not None:
-            print(f"💀 dead coord {possible_coord}")
+          self._allowed_coords.remove(dead_coord)
+          self._dead_trail.append((len(self._trail), dead_coord))
+          if metrics is not None:
+            metrics.dead_coords += 1
+            metrics.log(f"💀 dead coord {dead_coord}")
+      self._frontier_dead.clear()
+
+      # pop the best scoring coords off the heap, dropping entries that went stale
+      max_score_all_possible_coords = 0
+      max_scoring_coords = []
+      while len(self._frontier_heap) > 0:
+        (negative_score, possible_coord) = self._frontier_heap[0]
+        cached = self._frontier_cache.get(possible_coord)
+        if possible_coord not in self._allowed_coords or cached is None or cached[0] != -negative_score:
+          heapq.heappop(self._frontier_heap)
+        elif len(max_scoring_coords) > 0 and -negative_score != max_score_all_possible_coords:
+          break
+        else:
+          heapq.heappop(self._frontier_heap)
+          max_score_all_possible_coords = -negative_score
+          if possible_coord not in max_scoring_coords:
+            max_scoring_coords.append(possible_coord)
 
-      if os.environ.get(Puzzle.DEBUG_FLAG) is not None:
-        print(f"---> coord scores: {coord_scores}")
+      moves = []
+      for possible_coord in max_scoring_coords:
+        heapq.heappush(self._frontier_heap, (-max_score_all_possible_coords, possible_coord))
+        (score, fitting_tiles) = self._frontier_cache[possible_coord]
+        if self._frontier_live[possible_coord] < len(fitting_tiles):
+          # tiles were placed since the coord was scored, dropped once here rather than on every placement
+          fitting_tiles = [(fitting_tile, rotation_count) for (fitting_tile, rotation_count) in fitting_tiles if not self._placed_mask >> self._tile_positions[fitting_tile] & 1]
+          self._frontier_cache[possible_coord] = (score, fitting_tiles)
+        for max_scoring_tile, tile_rotation_count in fitting_tiles:
+          moves.append(Puzzle.Move(tile=max_scoring_tile, rotation_count=tile_rotation_count, coord=possible_coord))
+
+      if metrics is not None and metrics.verbose:
+        metrics.log(f"---> coord scores: {dict((coord, self._frontier_cache[coord][0]) for coord in self._allowed_coords)}")
 
       return (max_score_all_possible_coords, moves)
 
-  def solve(self, export_board: bool = False, allow_rotation: bool = False) -> None:
-    # shuffle the tiles
-    random.shuffle(self._tiles)
-    solved_puzzles = []
+  def _next_frontier_coord(self) -> Tuple[int, int]:
+    # coords before the first tile in row major order stay empty, so every layout is only found once instead of once per translation
+    frontier = [coord for coord in self._allowed_coords if coord > Puzzle.FIRST_TILE_COORD]
+    return min(frontier) if len(frontier) > 0 else None
+
+  def _has_open_edges(self) -> bool:
+    return any(Puzzle._must_fill(required_codes=self._coord_requirements(coord=coord, closed=True)[0]) for coord in self._allowed_coords)
+
+  def _next_branch(self, allow_rotation: bool, distinct_options: Dict[Tuple[int, int], int], forward_checking: bool, closed: bool) -> Tuple[Tuple[int, int], List[Tuple[Tile, int]]]:
+    # the frontier coord to branch on and its options, a None option leaves the coord empty, None when the branch is dead
+    # closed searches never leave a coord empty while an edge faces it
+    if not forward_checking:
+      coord = self._next_frontier_coord()
+      if coord is None:
+        return None
+
+      required_codes = self._coord_requirements(coord=coord, closed=closed)[0]
+      options = self._fitting_tiles(required_codes=required_codes, allow_rotation=allow_rotation, distinct_options=distinct_options)
+      return (coord, options if closed and Puzzle._must_fill(required_codes=required_codes) else options + [None])
+
+    # forward checking: the candidate domain of every frontier coord, the coord with the fewest options goes first
+    best_branch = None
+    must_fill_count = 0
+    for coord in self._allowed_coords:
+      if coord < Puzzle.FIRST_TILE_COORD:
+        continue
+
+      required_codes = self._coord_requirements(coord=coord, closed=closed)[0]
+      domain = self._fitting_tiles(required_codes=required_codes, allow_rotation=allow_rotation, distinct_options=distinct_options)
+      must_fill = closed and Puzzle._must_fill(required_codes=required_codes)
+      if must_fill:
+        must_fill_count += 1
+        if len(domain) == 0:
+          return None
+
+      # a coord with an empty domain stays empty, like a blocked one
+      if len(domain) > 0:
+        options = domain if must_fill else domain + [None]
+        if best_branch is None or (len(options), coord) < (len(best_branch[1]), best_branch[0]):
+          best_branch = (coord, options)
+
+    # each coord that must be filled needs its own tile
+    if must_fill_count > len(self._tiles) - len(self._placed):
+      return None
+
+    return best_branch
 
-    # place each tile as first
-    for first_tile_idx, first_tile in enumerate(self._tiles):
-      worker_puzzle = Puzzle(board=self.board, tiles=self.tiles)
-      worker_puzzle.reset()
-      puzzle_moves = [(1, [Puzzle.Move(tile=first_tile, rotation_count=0, coord=Puzzle.FIRST_TILE_COORD)])]
+  @classmethod
+  def _tile_shape(cls, tile: Tile, allow_rotation: bool) -> Tuple[int, int, int, int]:
+    # identical tiles share the shape, with rotation a tile turned is identical too
+    return min(tile.orientation_codes(rotation_count=rotation_count) for rotation_count in range(0, 4)) if allow_rotation else tile.orientation_codes(rotation_count=0)
+
+  def _twinned_tile_mask(self, allow_rotation: bool) -> int:
+    # bits of the tiles with an identical tile in the set
+    tile_positions_by_shape = {}
+    for tile_idx, tile in enumerate(self._tiles):
+      tile_positions_by_shape.setdefault(Puzzle._tile_shape(tile=tile, allow_rotation=allow_rotation), []).append(tile_idx)
+
+    return sum(1 << tile_idx for tile_positions in tile_positions_by_shape.values() if len(tile_positions) > 1 for tile_idx in tile_positions)
+
+  def _distinct_options(self, allow_rotation: bool) -> Tuple[Dict[Tuple[int, int], int], bool]:
+    # the (tile position, rotation count) options of an exhaustive search only finding distinct solutions, each with
+    # the bits of the identical tiles before it in the list, which it waits for: identical tiles get placed in the
+    # order of the list, and a rotation giving a tile a look it already has is left out, so no solution is found again
+    # with identical tiles swapped
+    # with rotation a tile without an identical one and with 4 looks is only placed unrotated, so only one of the 4
+    # quarter turns of a solution is found. the bool tells if quarter turns of a solution can still both be found,
+    # when no tile can be pinned or, without rotation, the tile edges turned are the same tile edges again
+    distinct_options = {}
+    earlier_masks = {}
+    for tile_idx, tile in enumerate(self._tiles):
+      shape = Puzzle._tile_shape(tile=tile, allow_rotation=allow_rotation)
+      earlier_mask = earlier_masks.get(shape, 0)
+      earlier_masks[shape] = earlier_mask | 1 << tile_idx
+      looks = set()
+      for rotation_count in ([0, 1, 2, 3] if allow_rotation else [0]):
+        codes = tile.orientation_codes(rotation_count=rotation_count)
+        if codes not in looks:
+          looks.add(codes)
+          distinct_options[(tile_idx, rotation_count)] = earlier_mask
+
+    if not allow_rotation:
+      tile_edges = sorted(tile.orientation_codes(rotation_count=0) for tile in self._tiles)
+      return (distinct_options, any(sorted(tile.orientation_codes(rotation_count=quarter_turns) for tile in self._tiles) == tile_edges for quarter_turns in range(1, 4)))
+
+    twinned_tile_mask = self._twinned_tile_mask(allow_rotation=allow_rotation)
+    pinned_tile_idx = next((tile_idx for tile_idx in range(0, len(self._tiles)) if not twinned_tile_mask >> tile_idx & 1 and all((tile_idx, rotation_count) in distinct_options for rotation_count in range(1, 4))), None)
+    if pinned_tile_idx is not None:
+      for rotation_count in range(1, 4):
+        del distinct_options[(pinned_tile_idx, rotation_count)]
+    return (distinct_options, pinned_tile_idx is None)
+
+  def _push_option(self, coord: Tuple[int, int], option: Tuple[Tile, int]) -> None:
+    # a None option leaves the coord empty
+    if option is None:
+      self._push_blocked(coord=coord)
+    else:
+      (tile, rotation_count) = option
+      self._push_tile(tile=tile, rotation_count=rotation_count, coord=coord)
+
+  def _backtrack(self, allow_rotation: bool, distinct_options: Dict[Tuple[int, int], int] = None, transpositions: TranspositionTable = None, skip_expanded: bool = False, forward_checking: bool = False, closed: bool = False, deadline: float = None, path: List[int] = None, progress_interval: float = None) -> Iterator[List[Move]]:
+    # depth first from the placed first tile, every step either fills the next frontier coord
+    # with one of the fitting tiles or leaves it empty for the rest of the branch
+    # frames are [coord, options, next option index, state hash, solutions found before], a None option leaves the coord empty
+    # only the distinct options are tried when given
+    # states already proven dead are skipped, so are the ones already expanded when skip_expanded is set
+    # closed searches only yield layouts where every edge meets a matching one
+    # past the time.monotonic() deadline the search stops where it is, leaving the board as it was then
+    # path is set to the next option index of every frame whenever the search yields, a search given the path of an
+    # earlier one over the same board makes those options again and goes on right after where that one yielded
+    # with a progress_interval, None is yielded that many seconds apart while no solution comes, e.g. to save the path
+    stack = []
+    nodes = 0
+    metrics = self._metrics
+    last_step = time.perf_counter() if metrics is not None else None
+    last_progress = time.monotonic()
+    solutions_found = 0
+    # each labelled partial board comes up only once, it can only repeat with a tile swapped for an identical one
+    twinned_tile_mask = self._twinned_tile_mask(allow_rotation=allow_rotation) if transpositions is not None else 0
+
+    # the search is deterministic, so the frames of the path come up again with the same options
+    for next_option_idx in (path or []):
+      (coord, options) = self._next_branch(allow_rotation=allow_rotation, distinct_options=distinct_options, forward_checking=forward_checking, closed=closed)
+      stack.append([coord, options, next_option_idx, None, solutions_found])
+      if next_option_idx > 0:
+        self._push_option(coord=coord, option=options[next_option_idx - 1])
+    # the board the path ends on was expanded already
+    descend = not path
+
+    while True:
+      if descend:
+        if metrics is not None:
+          metrics.nodes_expanded += 1
+        if len(self._placed) == len(self._tiles):
+          if not closed or not self._has_open_edges():
+            solutions_found += 1
+            if metrics is not None:
+              metrics.solutions += 1
+            if path is not None:
+              path[:] = [frame[2] for frame in stack]
+            yield self.placed_moves()
+            last_progress = time.monotonic()
+        else:
+          branch = self._next_branch(allow_rotation=allow_rotation, distinct_options=distinct_options, forward_checking=forward_checking, closed=closed)
+          coord = None if branch is None else branch[0]
+          state_hash = None
+          if coord is not None and transpositions is not None and self._placed_mask & twinned_tile_mask != 0:
+            state_hash = self.state_hash
+            known_state = transpositions.lookup(state_hash=state_hash)
+            if known_state == TranspositionTable.DEAD or (known_state is not None and skip_expanded):
+              coord = None
+
+          if coord is not None:
+            stack.append([coord, branch[1], 0, state_hash, solutions_found])
+
+        if progress_interval is not None and nodes % Puzzle.DEADLINE_CHECK_NODES == 0 and time.monotonic() - last_progress >= progress_interval:
+          if path is not None:
+            path[:] = [frame[2] for frame in stack]
+          yield None
+          last_progress = time.monotonic()
+
+      descend = False
+      if metrics is not None:
+        now = time.perf_counter()
+        metrics.add_depth_time(depth=len(stack), seconds=now - last_step)
+        last_step = now
+      while len(stack) > 0:
+        frame = stack[-1]
+        (coord, options, option_idx, state_hash, solutions_found_before) = frame
+        if option_idx > 0:
+          # revert the previous option before trying the next one
+          self.undo()
+
+        if option_idx == len(options):
+          stack.pop()
+          if state_hash is not None:
+            transpositions.store(state_hash=state_hash, state=TranspositionTable.EXPANDED if solutions_found > solutions_found_before else TranspositionTable.DEAD)
+        else:
+          frame[2] += 1
+          self._push_option(coord=coord, option=options[option_idx])
+          descend = True
+          break
+
+      if not descend:
+        return
+
+      nodes += 1
+      if deadline is not None and nodes % Puzzle.DEADLINE_CHECK_NODES == 0 and time.monotonic() >= deadline:
+        return
+
+  @property
+  def transposition_stats(self) -> Dict[str, int]:
+    # transposition table counters summed over the subtrees of the latest solve_all
+    return self._transposition_stats
+
+  def _first_placements(self, allow_rotation: bool, distinct: bool) -> List[Tuple[int, int]]:
+    # (tile position, rotation count) of the first tile of each subtree of the exhaustive search
+    if distinct:
+      # nothing is placed before the first tile, so it can only be a tile waiting for no other
+      return [option for (option, earlier_mask) in sorted(self._distinct_options(allow_rotation=allow_rotation)[0].items()) if earlier_mask == 0]
+
+    return [(first_tile_idx, rotation_count) for first_tile_idx in range(0, len(self._tiles)) for rotation_count in ([0, 1, 2, 3] if allow_rotation else [0])]
+
+  def iter_solutions(self, allow_rotation: bool = False, limit: int = None, deadline: float = None, distinct: bool = True, forward_checking: bool = False, closed: bool = False) -> Iterator[List[Tuple[int, int, Tuple[int, int]]]]:
+    # the exhaustive search of solve_all, yielding each solution as compact (tile position, rotation count, coord)
+    # moves as soon as it is found, the search only goes as far as the caller reads
+    # stops after limit solutions or once time.monotonic() passes the deadline
+    # distinct solutions are found only once by construction, see _distinct_options, the canonical forms of the
+    # solutions found are only kept for the tile sets where quarter turns of a solution can both be found, that set
+    # grows with every solution for the whole search
+    seen_forms = set() if distinct and self._distinct_options(allow_rotation=allow_rotation)[1] else None
+    solutions_found = 0
+    for (first_tile_idx, rotation_count) in self._first_placements(allow_rotation=allow_rotation, distinct=distinct):
+      if (limit is not None and solutions_found >= limit) or (deadline is not None and time.monotonic() >= deadline):
+        return
+
+      for compact_solution in _iter_subtree(tiles=self._tiles, first_tile_idx=first_tile_idx, rotation_count=rotation_count, allow_rotation=allow_rotation, distinct=distinct, transpositions=None, forward_checking=forward_checking, closed=closed, deadline=deadline, metrics=self._metrics):
+        if seen_forms is not None:
+          form = Puzzle.canonical_form(moves=self._expand_moves(compact_moves=compact_solution))
+          if form in seen_forms:
+            continue
+          seen_forms.add(form)
+
+        yield compact_solution
+        solutions_found += 1
+        if limit is not None and solutions_found >= limit:
+          return
+
+  def solve_all(self, allow_rotation: bool = False, distinct: bool = True, workers: int = 1, transposition_capacity: int = 0, forward_checking: bool = False, closed: bool = False, store_file: str = None, checkpoint_file: str = None, resume: bool = False, checkpoint_interval: float = SearchCheckpoint.DEFAULT_INTERVAL) -> List[List[Move]]:
+    # exhaustive search, returns every solution as the list of moves placing all the tiles, or None with a store_file
+    # distinct solutions differ by more than a quarter turn of the board or swapping identical tiles
+    # each first tile and rotation is a separate subtree, searched by a pool of processes when workers > 1, the
+    # solutions still come back in the order of the subtrees
+    # with a transposition_capacity each subtree skips partial boards it already searched, which only happens
+    # when identical tiles get swapped
+    # closed solutions have every edge meeting a matching one, forward checking then fails a branch as soon as an
+    # edge has no tile left to meet it, and always branches on the coord with the fewest options
+    # the solutions are appended to the store_file solution store as they come instead, none are kept in memory
+    # the progress is saved to the checkpoint_file every checkpoint_interval seconds, the solutions are only kept in the
+    # store so a checkpoint_file needs a store_file. with resume the search skips the subtrees the checkpoint has done
+    # and goes on from where it was in the others, the solutions stored after the checkpoint are dropped
+    checkpoint = None
+    if checkpoint_file is not None:
+      if store_file is None:
+        raise ValueError('a checkpointed search keeps its solutions in a store_file')
+      run = {'search': 'solve_all', 'tiles': self._tile_codes(), 'allow_rotation': allow_rotation, 'distinct': distinct, 'forward_checking': forward_checking, 'closed': closed}
+      checkpoint = SearchCheckpoint.open(path=checkpoint_file, run=run, resume=resume, interval=checkpoint_interval)
+    # like for iter_solutions, only kept when quarter turns of a solution can both be found
+    seen_forms = None
+    if distinct and self._distinct_options(allow_rotation=allow_rotation)[1]:
+      seen_forms = {Puzzle.canonical_form(moves=solution) for solution in self._stored_solutions(checkpoint=checkpoint, store_file=store_file)}
+
+    first_placements = self._first_placements(allow_rotation=allow_rotation, distinct=distinct)
+    subtree_indices = [subtree_idx for subtree_idx in range(0, len(first_placements)) if checkpoint is None or subtree_idx not in checkpoint.done_subtrees]
+    # checkpointed subtrees report where they are every PROGRESS_INTERVAL seconds
+    subtrees = [dict(first_tile_idx=first_tile_idx, rotation_count=rotation_count, allow_rotation=allow_rotation, distinct=distinct, transposition_capacity=transposition_capacity, forward_checking=forward_checking, closed=closed, metrics_verbose=self._metrics_verbose(), path=None if checkpoint is None else checkpoint.subtree_paths.get(subtree_idx), progress_interval=None if checkpoint is None else Puzzle.PROGRESS_INTERVAL) for (subtree_idx, (first_tile_idx, rotation_count)) in ((subtree_idx, first_placements[subtree_idx]) for subtree_idx in subtree_indices)]
+    solutions_by_subtree = {} if store_file is None else None
+
+    self._transposition_stats = {}
+    with SolutionWriter(path=store_file, tile_count=len(self._tiles), record_count=None if checkpoint is None else checkpoint.store_records) if store_file is not None else nullcontext() as solution_writer, checkpoint if checkpoint is not None else nullcontext():
+      if checkpoint is not None:
+        checkpoint.store = solution_writer
+      for position, event in self._map_subtrees(subtree_fn=_backtrack_subtree, subtrees=subtrees, workers=workers):
+        subtree_idx = subtree_indices[position]
+        if event[0] == 'done':
+          (_, subtree_stats, subtree_metrics) = event
+          for name, count in subtree_stats.items():
+            self._transposition_stats[name] = self._transposition_stats.get(name, 0) + count
+          if subtree_metrics is not None:
+            self._metrics.merge(counters=subtree_metrics)
+          if checkpoint is not None:
+            checkpoint.record(subtree_idx=subtree_idx)
+          continue
+
+        if event[0] == 'solution':
+          compact_solution = event[1]
+          form = None if seen_forms is None else Puzzle.canonical_form(moves=self._expand_moves(compact_moves=compact_solution))
+          if form is None or form not in seen_forms:
+            if form is not None:
+              seen_forms.add(form)
+            if solution_writer is not None:
+              solution_writer.append(solution=compact_solution)
+            else:
+              solutions_by_subtree.setdefault(subtree_idx, []).append(self._expand_moves(compact_moves=compact_solution))
+        # the path of the event comes last, the solutions found before it are stored
+        if checkpoint is not None:
+          checkpoint.advance(subtree_idx=subtree_idx, path=event[-1])
+
+    return None if solutions_by_subtree is None else [solution for subtree_idx in sorted(solutions_by_subtree) for solution in solutions_by_subtree[subtree_idx]]
+
+  def _tile_codes(self) -> List[List[int]]:
+    # the unrotated edge codes of every tile, telling tile sets apart in checkpoints
+    return [list(tile.orientation_codes(rotation_count=0)) for tile in self._tiles]
+
+  def _stored_solutions(self, checkpoint: SearchCheckpoint, store_file: str) -> List[List[Move]]:
+    # the solutions a resumed search had found, read back from its store up to the records its checkpoint counted
+    if checkpoint is None or checkpoint.store_records is None:
+      return []
+    with SolutionReader(path=store_file) as reader:
+      return [self._expand_moves(compact_moves=reader[solution_idx]) for solution_idx in range(0, min(len(reader), checkpoint.store_records))]
+
+  def _greedy(self, first_tile: Tile, allow_rotation: bool, rng: random.Random, vectorized: bool = False, deadline: float = None, max_nodes: int = None) -> List[Move]:
+    # follows the best scoring moves from the first tile, returns the moves if all the tiles got placed
+    # stops once max_nodes tiles are placed or time.monotonic() passes the deadline, the board stays as far as it got
+    self.reset()
+    puzzle_moves = [(1, [Puzzle.Move(tile=first_tile, rotation_count=0, coord=Puzzle.FIRST_TILE_COORD)])]
+    max_move_score = 1
+    has_more_moves = True
+    metrics = self._metrics
+    last_step = time.perf_counter() if metrics is not None else None
+
+    while has_more_moves:
+      next_puzzle_moves = []
+      # shuffle the moves
+      rng.shuffle(puzzle_moves)
+
+      for (_, moves) in puzzle_moves:
+        for move in moves:
+          tile_in_move = move.tile
+          rotation_count_in_move = move.rotation_count
+          coord_in_move = move.coord
+
+          if self.place_tile(tile=tile_in_move, rotation_count=rotation_count_in_move, coord=coord_in_move):
+            # first made move wins
+            if metrics is not None:
+              metrics.log(f"  💋 Move made: {move}")
+              metrics.nodes_expanded += 1
+
+            next_possible_moves = (nm_score, _) = self.next_moves(allow_rotation=allow_rotation, vectorized=vectorized)
+            if metrics is not None:
+              now = time.perf_counter()
+              metrics.add_depth_time(depth=len(self._placed) - 1, seconds=now - last_step)
+              last_step = now
+
+            if nm_score == -1:
+              if metrics is not None:
+                metrics.solutions += 1
+              return self.placed_moves()
+            elif (max_nodes is not None and len(self._placed) >= max_nodes) or (deadline is not None and time.monotonic() >= deadline):
+              return None
+            elif nm_score == max_move_score:
+              next_puzzle_moves.append(next_possible_moves)
+            elif nm_score > max_move_score:
+              max_move_score = nm_score
+              next_puzzle_moves = [next_possible_moves]
+
+            break
+
+      puzzle_moves = next_puzzle_moves
       max_move_score = 1
-      has_more_moves = True
-
-      while has_more_moves:
-        next_puzzle_moves = []
-        # shuffle the moves
-        random.shuffle(puzzle_moves)
-
-        for (_, moves) in puzzle_moves:
-          for move in moves:
-            tile_in_move = move.tile
-            rotation_count_in_move = move.rotation_count
-            coord_in_move = move.coord
-
-            if worker_puzzle.place_tile(tile=tile_in_move, rotation_count=rotation_count_in_move, coord=coord_in_move):
-              # first made move wins
-              if os.environ.get(Puzzle.DEBUG_FLAG) is not None:
-                print(f"  💋 Move made: {move}")
-
-              next_possible_moves = (nm_score, _) = worker_puzzle.next_moves(allow_rotation=allow_rotation)
-
-              if nm_score == -1:
-                solved_puzzles.append(worker_puzzle)
-                print(f"👌 => first tile index: {first_tile_idx}")
-                view_board(board=worker_puzzle.board, output_file=f"{Path.home()}/Downloads/traffic-puzzle-board/solution-{first_tile_idx}.png" if export_board is True else None)
-              elif nm_score == max_move_score:
-                next_puzzle_moves.append(next_possible_moves)
-              elif nm_score > max_move_score:
-                max_move_score = nm_score
-                next_puzzle_moves = [next_possible_moves]
-
-              break
-
-        puzzle_moves = next_puzzle_moves
-        max_move_score = 1
-        has_more_moves = len(puzzle_moves) != 0
+      has_more_moves = len(puzzle_moves) != 0
+
+    return None
+
+  def _beam(self, first_tile: Tile, allow_rotation: bool, width: int, vectorized: bool = False) -> List[Move]:
+    # keeps the width best boards by cumulative move score at every step instead of following a single line of play,
+    # ties keep the order next_moves gave, so width 1 makes the same moves as _greedy
+    # every board is its own tuple of moves, replayed on this puzzle to be expanded
+    # returns the moves of the first board placing all the tiles
+    metrics = self._metrics
+    first_move = Puzzle.Move(tile=first_tile, rotation_count=0, coord=Puzzle.FIRST_TILE_COORD)
+    # (cumulative score, moves, zobrist hash of the placements)
+    beam = [(0, (first_move,), self._placement_key(move=first_move))]
+    self.reset()
+
+    while len(beam) > 0:
+      candidates = []
+      seen_boards = set()
+      for (beam_score, beam_moves, board_key) in beam:
+        self._replay_trail(moves=beam_moves)
+        if metrics is not None:
+          metrics.nodes_expanded += 1
+
+        (score, moves) = self.next_moves(allow_rotation=allow_rotation, vectorized=vectorized)
+        if score == -1:
+          if metrics is not None:
+            metrics.solutions += 1
+          return list(beam_moves)
+        elif score < 1:
+          continue
+
+        # the moves of a board all score the same, only its first width new boards can make it into the next beam
+        children = 0
+        for move in moves:
+          # the same board reached through moves made in another order is only kept once
+          child_key = board_key ^ self._placement_key(move=move)
+          if child_key in seen_boards:
+            continue
+          seen_boards.add(child_key)
+          candidates.append((beam_score + score, beam_moves + (move,), child_key))
+          children += 1
+          if children == width:
+            break
+
+      # a stable sort, best first
+      candidates.sort(key=lambda candidate: -candidate[0])
+      beam = candidates[:width]
+
+    return None
+
+  def _deepest_first(self, first_tile: Tile, allow_rotation: bool, max_open: int = DEEPEST_FIRST_MAX_OPEN, max_nodes: int = DEEPEST_FIRST_MAX_NODES, vectorized: bool = False, deadline: float = None) -> List[Move]:
+    # a depth first search over partial boards kept in a heap: expands the waiting board with the most tiles placed,
+    # so it goes deep first and backs out of dead ends to the deepest board left, boards as deep are ordered by their
+    # layout score plus HEAD_TAIL_SCORE for each open head or tail edge that may still get closed
+    # it is not a best first search: that ordering is a heuristic, not a bound on the score still to come, and an
+    # optimistic bound does not lead to full boards here, every side left facing the outside of a layout lowers it so
+    # deeper boards always rank below shallower ones
+    # boards are (move, parent board) chains sharing the moves they have in common, replayed on this puzzle to be
+    # expanded, at most about max_open of them wait and the worst are dropped beyond that, the boards remembered to
+    # skip repeats are cut back to the waiting ones past 4 * max_open
+    # returns the moves of the first board placing all the tiles, None once no board is left or after max_nodes
+    # expansions or past the time.monotonic() deadline
+    metrics = self._metrics
+    first_move = Puzzle.Move(tile=first_tile, rotation_count=0, coord=Puzzle.FIRST_TILE_COORD)
+    first_open_edges = sum(1 for code in first_tile.orientation_codes(rotation_count=0) if Puzzle._ARROW_EDGES[code])
+    first_key = self._placement_key(move=first_move)
+    # (-tiles placed, -(layout score + open edge estimate), push order, layout score, open edges, board key, chain)
+    heap = [(-1, -first_open_edges * Puzzle.HEAD_TAIL_SCORE, 0, 0, first_open_edges, first_key, (first_move, None))]
+    seen_boards = {first_key}
+    pushed = 1
+    nodes = 0
+    self.reset()
+
+    while len(heap) > 0:
+      if (max_nodes is not None and nodes >= max_nodes) or (deadline is not None and nodes % Puzzle.DEADLINE_CHECK_NODES == 0 and time.monotonic() >= deadline):
+        return None
+
+      (negative_placed, _, _, layout_score, open_edges, board_key, board_chain) = heapq.heappop(heap)
+      moves = []
+      chain = board_chain
+      while chain is not None:
+        (move, chain) = chain
+        moves.append(move)
+      moves.reverse()
+      self._replay_trail(moves=moves)
+      nodes += 1
+      if metrics is not None:
+        metrics.nodes_expanded += 1
+
+      (score, next_moves) = self.next_moves(allow_rotation=allow_rotation, vectorized=vectorized)
+      if score == -1:
+        if metrics is not None:
+          metrics.solutions += 1
+        return moves
+      elif score < 1:
+        continue
+
+      for move in next_moves:
+        child_key = board_key ^ self._placement_key(move=move)
+        if child_key in seen_boards:
+          continue
+        seen_boards.add(child_key)
+
+        (pair_score, closed_edges, opened_edges) = self._placement_effect(move=move)
+        child_layout_score = layout_score + pair_score
+        child_open_edges = open_edges - closed_edges + opened_edges
+        heapq.heappush(heap, (negative_placed - 1, -(child_layout_score + child_open_edges * Puzzle.HEAD_TAIL_SCORE), pushed, child_layout_score, child_open_edges, child_key, (move, board_chain)))
+        pushed += 1
+
+      if len(heap) > 2 * max_open:
+        # sorted, so still a heap
+        heap = heapq.nsmallest(max_open, heap)
+      if len(seen_boards) > 4 * max_open:
+        # an expanded board may come up again, it is only searched twice
+        seen_boards = {entry[5] for entry in heap}
+
+    return None
+
+  def _placement_effect(self, move: Move) -> Tuple[int, int, int]:
+    # what placing the move on the board adds to the layout score, the open head and tail edges it closes and the ones
+    # it leaves facing an empty coord
+    pair_score = 0
+    closed_edges = 0
+    opened_edges = 0
+    codes = move.tile.orientation_codes(rotation_count=move.rotation_count)
+    for side, neighbor_coord in enumerate(Puzzle.neighboring_coords(coord=move.coord)):
+      neighbor = self._board.get(neighbor_coord)
+      if neighbor is None:
+        if Puzzle._ARROW_EDGES[codes[side]]:
+          opened_edges += 1
+      else:
+        neighbor_code = neighbor.edge_codes[(side + 2) % 4]
+        pair_score += Puzzle._EDGE_SCORES[neighbor_code][codes[side]]
+        if Puzzle._ARROW_EDGES[neighbor_code]:
+          closed_edges += 1
+
+    return (pair_score, closed_edges, opened_edges)
+
+  def _placement_key(self, move: Move) -> int:
+    return zobrist_key(feature=(self._tile_positions[move.tile], move.rotation_count, move.coord))
+
+  def _replay_trail(self, moves: Tuple[Move, ...]) -> None:
+    # brings the board to the moves, only undoing the placements past the prefix shared with the board
+    shared = 0
+    while shared < min(len(self._trail), len(moves)) and self._trail[shared][1] is moves[shared].tile and self._trail[shared][0] == moves[shared].coord and self._board[moves[shared].coord].rotation_count == moves[shared].rotation_count:
+      shared += 1
+    while len(self._trail) > shared:
+      self.undo()
+    for move in moves[shared:]:
+      self._push_tile(tile=move.tile, rotation_count=move.rotation_count, coord=move.coord)
+
+  def layout_score(self) -> int:
+    # total connection score of every pair of touching placed tiles
+    score = 0
+    for (row, col), placed_tile in self._board.items():
+      for side, neighbor_coord in [(1, (row, col + 1)), (2, (row + 1, col))]:
+        neighbor = self._board.get(neighbor_coord)
+        if neighbor is not None:
+          score += Puzzle._EDGE_SCORES[neighbor.edge_codes[(side + 2) % 4]][placed_tile.edge_codes[side]]
+
+    return score
+
+  def solve_anytime(self, allow_rotation: bool = False, deadline: float = None, max_nodes: int = None, seed: int = None, vectorized: bool = False) -> Tuple[List[Move], int]:
+    # the greedy search of solve from one first tile after the other, until a solution turns up or the budget runs out:
+    # the time.monotonic() deadline or max_nodes tiles placed over all the runs
+    # returns the best layout reached with its layout score, best being the most tiles placed and then the highest
+    # score, it is a solution when it places every tile
+    if seed is None:
+      seed = random.randrange(0, 2 ** 32)
+    first_tile_indices = list(range(0, len(self._tiles)))
+    random.Random(seed).shuffle(first_tile_indices)
+
+    # searched on a puzzle of its own, leaving this one untouched
+    search = Puzzle(tiles=self._tiles)
+    search._metrics = self._metrics
+    (best_moves, best_score) = ([], 0)
+    nodes = 0
+    for first_tile_idx in first_tile_indices:
+      if (max_nodes is not None and nodes >= max_nodes) or (deadline is not None and time.monotonic() >= deadline):
+        break
+
+      solution = search._greedy(first_tile=self._tiles[first_tile_idx], allow_rotation=allow_rotation, rng=random.Random(seed + first_tile_idx), vectorized=vectorized, deadline=deadline, max_nodes=None if max_nodes is None else max_nodes - nodes)
+      moves = search.placed_moves()
+      nodes += len(moves)
+      score = search.layout_score()
+      if (len(moves), score) > (len(best_moves), best_score):
+        (best_moves, best_score) = (moves, score)
+      if solution is not None:
+        break
+
+    return (best_moves, best_score)
+
+  def _metrics_verbose(self) -> bool:
+    # what subtrees searched on other puzzles need to collect metrics for this one, None for no metrics
+    return None if self._metrics is None else self._metrics.verbose
+
+  def _map_subtrees(self, subtree_fn, subtrees: List[Dict], workers: int) -> Iterator[Tuple[int, Any]]:
+    # runs the generator subtree_fn(tiles=tiles, **subtree) for every subtree, yields (subtree position, event) for
+    # each of their events as soon as it comes, e.g. to be checkpointed, the events of a subtree come in order but
+    # subtrees searched by a pool of processes interleave and finish in any order
+    if workers <= 1:
+      return ((position, event) for position, subtree in enumerate(subtrees) for event in subtree_fn(tiles=self._tiles, **subtree))
+
+    return self._map_subtrees_in_pool(subtree_fn=subtree_fn, subtrees=subtrees, workers=workers)
+
+  def _map_subtrees_in_pool(self, subtree_fn, subtrees: List[Dict], workers: int) -> Iterator[Tuple[int, Any]]:
+    # the pool is terminated however the search stops, an interrupted or terminated search, or a caller stopping
+    # early, waits for none of the subtrees so the checkpoint gets written right away, the subtrees running go on
+    # from their checkpointed paths on resume
+    subtree_events = multiprocessing.Queue()
+    with multiprocessing.Pool(processes=workers, initializer=_start_subtree_process, initargs=(subtree_events,)) as pool:
+      # a failed subtree fails the search
+      pool.map_async(_send_subtree_events, [(subtree_fn, position, dict(subtree, tiles=self._tiles)) for position, subtree in enumerate(subtrees)], chunksize=1, error_callback=lambda error: subtree_events.put((None, error)))
+      subtrees_left = len(subtrees)
+      while subtrees_left > 0:
+        (position, event) = subtree_events.get()
+        if position is None:
+          raise event
+        if event is None:
+          subtrees_left -= 1
+        else:
+          yield (position, event)
+
+  def _compact_moves(self, moves: List[Move]) -> List[Tuple[int, int, Tuple[int, int]]]:
+    # (tile position, rotation count, coord) survives being sent between processes
+    return [(self._tile_positions[move.tile], move.rotation_count, move.coord) for move in moves]
+
+  def _expand_moves(self, compact_moves: List[Tuple[int, int, Tuple[int, int]]]) -> List[Move]:
+    return [Puzzle.Move(tile=self._tiles[tile_idx], rotation_count=rotation_count, coord=coord) for (tile_idx, rotation_count, coord) in compact_moves]
+
+  def replay(self, moves: List[Move]) -> Puzzle:
+    # a new puzzle over the same tiles with the moves made, e.g. to view a solution
+    puzzle = Puzzle(tiles=self._tiles)
+    puzzle.reset()
+    for move in moves:
+      puzzle._push_tile(tile=move.tile, rotation_count=move.rotation_count, coord=move.coord)
+
+    return puzzle
+
+  def solve(self, export_board: bool = False, allow_rotation: bool = False, workers: int = 1, seed: int = None, vectorized: bool = False, store_file: str = None, checkpoint_file: str = None, resume: bool = False, checkpoint_interval: float = SearchCheckpoint.DEFAULT_INTERVAL, beam_width: int = 1, deepest_first: bool = False) -> List[List[Move]]:
+    # each first tile gets its own random generator seeded from seed, so runs are reproducible with any number of workers
+    # subtrees searched in parallel finish in any order, the solutions are still returned in the order of their first
+    # tiles and a layout found from several first tiles is kept from the earliest one
+    # a beam_width above 1 keeps that many boards at every step of the search from each first tile, trading time for
+    # more first tiles leading to a solution
+    # deepest_first backs out of dead ends to the deepest board left instead, up to DEEPEST_FIRST_MAX_NODES boards
+    # from each first tile
+    # the solutions are appended to the store_file solution store too
+    # the progress is saved to the checkpoint_file like for solve_all, a resumed run goes on with the seed it started with
+    # and returns the solutions it found before too, read back from the store
+    checkpoint = None
+    if checkpoint_file is not None:
+      if store_file is None:
+        raise ValueError('a checkpointed search keeps its solutions in a store_file')
+      run = {'search': 'solve', 'tiles': self._tile_codes(), 'allow_rotation': allow_rotation, 'beam_width': beam_width, 'deepest_first': deepest_first, 'seed': seed}
+      checkpoint = SearchCheckpoint.open(path=checkpoint_file, run=run, resume=resume, interval=checkpoint_interval)
+      seed = checkpoint.run['seed']
+    if seed is None:
+      seed = random.randrange(0, 2 ** 32)
+      if checkpoint is not None:
+        checkpoint.run['seed'] = seed
+    solutions = self._stored_solutions(checkpoint=checkpoint, store_file=store_file)
+    seen_forms = {Puzzle.canonical_form(moves=solution) for solution in solutions}
+
+    # shuffle the order the first tiles are tried in
+    first_tile_indices = list(range(0, len(self._tiles)))
+    random.Random(seed).shuffle(first_tile_indices)
+    if checkpoint is not None:
+      first_tile_indices = [first_tile_idx for first_tile_idx in first_tile_indices if first_tile_idx not in checkpoint.done_subtrees]
+    subtrees = [dict(first_tile_idx=first_tile_idx, allow_rotation=allow_rotation, seed=seed + first_tile_idx, vectorized=vectorized, metrics_verbose=self._metrics_verbose(), beam_width=beam_width, deepest_first=deepest_first) for first_tile_idx in first_tile_indices]
+    solutions_by_position = {}
+    form_positions = {}
+
+    # boards are rendered and saved in the background while the next first tiles are searched
+    with ExportQueue() as export_queue, SolutionWriter(path=store_file, tile_count=len(self._tiles), record_count=None if checkpoint is None else checkpoint.store_records) if store_file is not None else nullcontext() as solution_writer, checkpoint if checkpoint is not None else nullcontext():
+      if checkpoint is not None:
+        checkpoint.store = solution_writer
+      # place each tile as first
+      for position, (compact_solution, subtree_metrics) in self._map_subtrees(subtree_fn=_greedy_subtree_events, subtrees=subtrees, workers=workers):
+        first_tile_idx = first_tile_indices[position]
+        if subtree_metrics is not None:
+          self._metrics.merge(counters=subtree_metrics)
+        if compact_solution is not None:
+          solution = self._expand_moves(compact_moves=compact_solution)
+          # the same layout shows up again from other first tiles, shifted or turned
+          form = Puzzle.canonical_form(moves=solution)
+          if form in seen_forms or form in form_positions:
+            print(f"👯 => first tile index: {first_tile_idx}")
+            if form_positions.get(form, position) > position:
+              del solutions_by_position[form_positions[form]]
+              (solutions_by_position[position], form_positions[form]) = (solution, position)
+          else:
+            (solutions_by_position[position], form_positions[form]) = (solution, position)
+            print(f"👌 => first tile index: {first_tile_idx}")
+            if solution_writer is not None:
+              solution_writer.append(solution=compact_solution)
+            export_queue.submit(key=form, moves=solution, output_file=f"{Path.home()}/Downloads/traffic-puzzle-board/solution-{first_tile_idx}.png" if export_board is True else None)
+
+        if checkpoint is not None:
+          checkpoint.record(subtree_idx=first_tile_idx)
 
     print('✅')
+    return solutions + [solutions_by_position[position] for position in sorted(solutions_by_position)]
+
+
+# the queue pool processes send the events of their subtrees through, set up when each process starts
+_subtree_events = None
+
+
+def _start_subtree_process(subtree_events) -> None:
+  global _subtree_events
+  _subtree_events = subtree_events
+  # a terminated process does not wait for its events to be read
+  _subtree_events.cancel_join_thread()
+
+
+def _send_subtree_events(task: Tuple) -> None:
+  # a subtree searched by a pool process, its events go out with its position among the subtrees as soon as they
+  # come, then None once it is done
+  (subtree_fn, position, subtree) = task
+  for event in subtree_fn(**subtree):
+    _subtree_events.put((position, event))
+  _subtree_events.put((position, None))
+
+
+def _backtrack_subtree(tiles: List[Tile], first_tile_idx: int, rotation_count: int, allow_rotation: bool, distinct: bool, transposition_capacity: int, forward_checking: bool, closed: bool, metrics_verbose: bool, path: List[int] = None, progress_interval: float = None) -> Iterator[Tuple]:
+  # the events of the search below one first tile in one rotation, as they come:
+  # ('solution', compact moves, path) for each solution and ('progress', path) every progress_interval seconds in
+  # between, path being where the search goes on from, and last ('done', transposition table counters, search
+  # metrics or None when metrics_verbose is None)
+  # given the path of an earlier search of the subtree, only the solutions after it are found
+  transpositions = TranspositionTable(capacity=transposition_capacity) if transposition_capacity > 0 else None
+  metrics = SearchMetrics(verbose=metrics_verbose) if metrics_verbose is not None else None
+  path = list(path or [])
+  for compact_solution in _iter_subtree(tiles=tiles, first_tile_idx=first_tile_idx, rotation_count=rotation_count, allow_rotation=allow_rotation, distinct=distinct, transpositions=transpositions, forward_checking=forward_checking, closed=closed, metrics=metrics, path=path, progress_interval=progress_interval):
+    if compact_solution is None:
+      yield ('progress', list(path))
+    else:
+      yield ('solution', compact_solution, list(path))
+
+  yield ('done', {} if transpositions is None else transpositions.stats, None if metrics is None else metrics.to_dict())
+
+
+def _iter_subtree(tiles: List[Tile], first_tile_idx: int, rotation_count: int, allow_rotation: bool, distinct: bool, transpositions: TranspositionTable, forward_checking: bool, closed: bool, deadline: float = None, metrics: SearchMetrics = None, path: List[int] = None, progress_interval: float = None) -> Iterator[List[Tuple[int, int, Tuple[int, int]]]]:
+  # the solutions below one first tile in one rotation as compact moves, as the search finds them
+  # path and progress_interval are the ones of _backtrack, None comes between the solutions with a progress_interval
+  (north_code, _, _, west_code) = tiles[first_tile_idx].orientation_codes(rotation_count=rotation_count)
+  if closed and (north_code != Connection.NO_EDGE or west_code != Connection.NO_EDGE):
+    # nothing can ever be placed north or west of the top left most tile
+    return
+
+  puzzle = Puzzle(tiles=tiles)
+  puzzle._metrics = metrics
+  puzzle.reset()
+  distinct_options = puzzle._distinct_options(allow_rotation=allow_rotation)[0] if distinct else None
+  puzzle._push_tile(tile=tiles[first_tile_idx], rotation_count=rotation_count, coord=Puzzle.FIRST_TILE_COORD)
+
+  # a partial board searched before only leads to solutions already found, up to swapping identical tiles
+  for solution in puzzle._backtrack(allow_rotation=allow_rotation, distinct_options=distinct_options, transpositions=transpositions, skip_expanded=distinct, forward_checking=forward_checking, closed=closed, deadline=deadline, path=path, progress_interval=progress_interval):
+    yield None if solution is None else puzzle._compact_moves(moves=solution)
+
+
+def _greedy_subtree(tiles: List[Tile], first_tile_idx: int, allow_rotation: bool, seed: int, vectorized: bool = False, metrics_verbose: bool = None, beam_width: int = 1, deepest_first: bool = False) -> Tuple[List[Tuple[int, int, Tuple[int, int]]], Dict]:
+  # the compact solution or None, and the search metrics unless metrics_verbose is None
+  puzzle = Puzzle(tiles=tiles)
+  puzzle._metrics = SearchMetrics(verbose=metrics_verbose) if metrics_verbose is not None else None
+  if deepest_first:
+    solution = puzzle._deepest_first(first_tile=tiles[first_tile_idx], allow_rotation=allow_rotation, vectorized=vectorized)
+  elif beam_width > 1:
+    solution = puzzle._beam(first_tile=tiles[first_tile_idx], allow_rotation=allow_rotation, width=beam_width, vectorized=vectorized)
+  else:
+    solution = puzzle._greedy(first_tile=tiles[first_tile_idx], allow_rotation=allow_rotation, rng=random.Random(seed), vectorized=vectorized)
+  return (None if solution is None else puzzle._compact_moves(moves=solution), None if puzzle._metrics is None else puzzle._metrics.to_dict())
+
+
+def _greedy_subtree_events(**subtree) -> Iterator[Tuple]:
+  # the one event of a greedy subtree for _map_subtrees, the result of _greedy_subtree
+  yield _greedy_subtree(**subtree)
+
+
+Puzzle._EDGE_SCORES = Puzzle._edge_scores_table()
+# _ARROW_EDGES[code] tells if the edge is a head or a tail
+Puzzle._ARROW_EDGES = tuple(code != Connection.NO_EDGE and Connection.from_code(code=code).connector != Connector.ROAD for code in range(0, Connection.EDGE_CODE_COUNT))
 
 
 if __name__ == '__main__':
+  import itertools
+  import tempfile
+
+  def interrupt_after(puzzle: Puzzle, event_count: int, kind: str = None) -> None:
+    # the next search of the puzzle stops like a killed run after event_count subtree events, only counting the ones
+    # of that kind when given
+    map_subtrees = puzzle._map_subtrees
+
+    def interrupted_map_subtrees(subtree_fn, subtrees: List[Dict], workers: int) -> Iterator:
+      counted = 0
+      for (position, event) in map_subtrees(subtree_fn=subtree_fn, subtrees=subtrees, workers=workers):
+        yield (position, event)
+        counted += kind is None or event[0] == kind
+        if counted == event_count:
+          break
+      del puzzle._map_subtrees
+      raise KeyboardInterrupt
+
+    puzzle._map_subtrees = interrupted_map_subtrees
+
   def tests():
     puzzle = Puzzle()
     tile_1 = Tile(
@@ -390,10 +1385,9 @@ if __name__ == '__main__':
     # place tile_1 as first
     puzzle._place_first_tile(tile=tile_1)
     assert [c for c in puzzle.occupied_coords] == [(20, 20)]
-    assert [c for c in puzzle.allowed_coords] == [(21, 20), (19, 20), (20, 19), (20, 21)]
+    assert puzzle.allowed_coords == {(21, 20), (19, 20), (20, 19), (20, 21)}
     # test next_moves
-    (puzzle, score, next_moves) = puzzle.next_moves()
-    assert type(puzzle) == Puzzle
+    (score, next_moves) = puzzle.next_moves()
     assert score == 3
     assert len(next_moves) == 3
     # test _can_place_tile
@@ -408,16 +1402,16 @@ if __name__ == '__main__':
     assert puzzle.can_place_tile(tile=tile_3, coord=(20, 19)) == (True, 3)  # head - tail on purple
     # test place_tile
     puzzle.place_tile(tile=tile_3, rotation_count=0, coord=(20, 19))
-    assert [c for c in puzzle._allowed_coords] == [(21, 20), (21, 19), (19, 20), (19, 19), (20, 18), (20, 21)]
+    assert puzzle.allowed_coords == {(21, 20), (21, 19), (19, 20), (19, 19), (20, 18), (20, 21)}
 
     puzzle.place_tile(tile=tile_4, rotation_count=0, coord=(20, 21))    
-    assert [c for c in puzzle.allowed_coords] == [(21, 20), (21, 19), (19, 20), (19, 19), (21, 21), (20, 22), (20, 18), (19, 21)]
+    assert puzzle.allowed_coords == {(21, 20), (21, 19), (19, 20), (19, 19), (21, 21), (20, 22), (20, 18), (19, 21)}
 
     puzzle.place_tile(tile=tile_5, rotation_count=0, coord=(21, 21))
-    assert [c for c in puzzle.allowed_coords] == [(21, 20), (22, 21), (21, 19), (19, 20), (21, 22), (19, 19), (20, 22), (20, 18), (19, 21)]
+    assert puzzle.allowed_coords == {(21, 20), (22, 21), (21, 19), (19, 20), (21, 22), (19, 19), (20, 22), (20, 18), (19, 21)}
 
     puzzle.place_tile(tile=tile_6, rotation_count=0, coord=(21, 20))
-    assert [c for c in puzzle.allowed_coords] == [(22, 21), (21, 19), (19, 20), (22, 20), (21, 22), (19, 19), (20, 22), (20, 18), (19, 21)]
+    assert puzzle.allowed_coords == {(22, 21), (21, 19), (19, 20), (22, 20), (21, 22), (19, 19), (20, 22), (20, 18), (19, 21)}
 
   def test_solve():
     puzzle = Puzzle()
@@ -504,13 +1498,308 @@ if __name__ == '__main__':
     assert next_move.rotation_count == 2
     assert puzzle.place_tile(tile=next_move.tile, rotation_count=next_move.rotation_count, coord=next_move.coord) is True
 
-    placed_tile = puzzle.board[19][20]
-    assert placed_tile.__repr__() == f"Tile({placed_tile.id}) [BEIGE ROAD @ NORTH,PURPLE HEAD @ EAST,None,None]"
+    placed_tile = puzzle.board_content(coord=(19, 20))
+    assert placed_tile.tile is tile_2
+    assert placed_tile.__repr__() == f"Tile({tile_2.id}) [BEIGE ROAD @ NORTH,PURPLE HEAD @ EAST,None,None] 🌀 2"
     assert placed_tile.rotation_count == 2
-    assert placed_tile.__str__() == f"Tile({placed_tile.id}) <🌀2> [None, None, BEIGE ROAD @ SOUTH, PURPLE HEAD @ WEST]"
+    assert placed_tile.__str__() == f"Tile({tile_2.id}) <🌀2> [None, None, BEIGE ROAD @ SOUTH, PURPLE HEAD @ WEST]"
+    # the tile itself is not turned
+    assert tile_2.north.direction == Direction.NORTH
 
-    # run solve with rotation
+    # run solve with rotation, the same seed gives the same solutions with any number of workers
+    puzzle.reset()
+    solutions = puzzle.solve(allow_rotation=True, seed=7)
+    assert puzzle.solve(allow_rotation=True, seed=7, workers=2) == solutions
+    if BatchScorer.is_supported():
+      assert puzzle.solve(allow_rotation=True, seed=7, vectorized=True) == solutions
+    # a beam of width 1 makes the greedy moves, wider beams keep every solution the greedy search finds
+    for first_tile in puzzle.tiles:
+      greedy_solution = puzzle._greedy(first_tile=first_tile, allow_rotation=True, rng=random.Random(7))
+      greedy_moves = puzzle.placed_moves()
+      assert (puzzle._beam(first_tile=first_tile, allow_rotation=True, width=1) is None) == (greedy_solution is None)
+      assert puzzle.placed_moves() == greedy_moves
     puzzle.reset()
-    puzzle.solve(allow_rotation=True)
+    assert len(puzzle.solve(allow_rotation=True, seed=7, beam_width=4)) >= len(solutions)
+    # anytime runs stop at the first solution, or return the best layout reached within the budget
+    (anytime_moves, anytime_score) = puzzle.solve_anytime(allow_rotation=True, seed=7)
+    assert len(anytime_moves) == len(puzzle.tiles) and anytime_score == puzzle.replay(moves=anytime_moves).layout_score()
+    (partial_moves, partial_score) = puzzle.solve_anytime(allow_rotation=True, seed=7, max_nodes=2)
+    assert len(partial_moves) == 2 and partial_score == puzzle.replay(moves=partial_moves).layout_score() > 0
+    assert puzzle.solve_anytime(allow_rotation=True, seed=7, deadline=time.monotonic()) == ([], 0)
+    assert len(puzzle.placed_tiles) == 0
+    # a resumed run goes on from its checkpoint with the seed it started with
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+      checkpoint_file = os.path.join(checkpoint_dir, 'solve.checkpoint')
+      store_file = os.path.join(checkpoint_dir, 'solutions.tpss')
+      interrupt_after(puzzle=puzzle, event_count=1)
+      try:
+        puzzle.solve(allow_rotation=True, seed=7, store_file=store_file, checkpoint_file=checkpoint_file, checkpoint_interval=3600)
+        assert False
+      except KeyboardInterrupt:
+        pass
+      # the solutions found before come back from the store, up to where they sit on the board
+      resumed_solutions = puzzle.solve(allow_rotation=True, store_file=store_file, checkpoint_file=checkpoint_file, resume=True)
+      assert [Puzzle.canonical_form(moves=solution) for solution in resumed_solutions] == [Puzzle.canonical_form(moves=solution) for solution in solutions]
+      # the solutions are only kept in the store
+      try:
+        puzzle.solve(allow_rotation=True, checkpoint_file=checkpoint_file, resume=True)
+        assert False
+      except ValueError:
+        pass
+
+  def test_solve_all():
+    tile_1 = Tile(
+      north=Connection(color=Color.BEIGE, direction=Direction.NORTH, connector=Connector.ROAD),
+      east=None,
+      south=None,
+      west=Connection(color=Color.YELLOW, direction=Direction.WEST, connector=Connector.TAIL)
+    )
+
+    tile_2 = Tile(
+      north=Connection(color=Color.BEIGE, direction=Direction.NORTH, connector=Connector.ROAD),
+      east=Connection(color=Color.PURPLE, direction=Direction.EAST, connector=Connector.HEAD),
+      south=None,
+      west=None
+    )
 
+    tile_3 = Tile(
+      north=None,
+      east=Connection(color=Color.PURPLE, direction=Direction.EAST, connector=Connector.TAIL),
+      south=None,
+      west=Connection(color=Color.YELLOW, direction=Direction.WEST, connector=Connector.HEAD)
+    )
+
+    puzzle = Puzzle()
+    for t in [tile_1, tile_2, tile_3]:
+      puzzle.add_tile(tile=t)
+
+    solutions = puzzle.solve_all(allow_rotation=True)
+    assert len(solutions) > 0
+    assert len({Puzzle.canonical_form(moves=solution) for solution in solutions}) == len(solutions)
+    # every distinct solution turns up 4 times, once per quarter turn, when symmetric ones are kept
+    all_solutions = puzzle.solve_all(allow_rotation=True, distinct=False)
+    assert len(all_solutions) == 4 * len(solutions)
+    assert {Puzzle.canonical_form(moves=solution) for solution in all_solutions} == {Puzzle.canonical_form(moves=solution) for solution in solutions}
+    # streamed solutions are the same, the caller can stop any time
+    assert [puzzle._expand_moves(compact_moves=compact_solution) for compact_solution in puzzle.iter_solutions(allow_rotation=True)] == solutions
+    assert len(list(puzzle.iter_solutions(allow_rotation=True, limit=1))) == 1
+    assert list(puzzle.iter_solutions(allow_rotation=True, deadline=time.monotonic())) == []
+    # stored solutions read back the same, up to where they sit on the board
+    with tempfile.TemporaryDirectory() as store_dir:
+      store_file = os.path.join(store_dir, 'solutions.tpss')
+      assert puzzle.solve_all(allow_rotation=True, store_file=store_file) is None
+      with SolutionReader(path=store_file) as reader:
+        assert [Puzzle.canonical_form(moves=puzzle._expand_moves(compact_moves=stored_solution)) for stored_solution in reader] == [Puzzle.canonical_form(moves=solution) for solution in solutions]
+    # subtrees searched in parallel give the same solutions
+    assert puzzle.solve_all(allow_rotation=True, workers=2) == solutions
+    # metrics add up over the subtrees, whichever process searched them
+    puzzle.enable_metrics()
+    puzzle.solve_all(allow_rotation=True)
+    serial_counters = puzzle.metrics.to_dict()
+    assert serial_counters['solutions'] >= len(solutions) and serial_counters['nodes_expanded'] > 0
+    puzzle.enable_metrics()
+    puzzle.solve_all(allow_rotation=True, workers=2)
+    assert {name: count for name, count in puzzle.metrics.to_dict().items() if name != 'depth_seconds'} == {name: count for name, count in serial_counters.items() if name != 'depth_seconds'}
+    with tempfile.TemporaryDirectory() as metrics_dir:
+      puzzle.metrics.to_json(output_file=os.path.join(metrics_dir, 'metrics.json'))
+    puzzle._metrics = None
+    # a subtree searched again from the path of any of its events only finds the solutions after that event
+    for forward_checking in [False, True]:
+      subtree = dict(tiles=puzzle.tiles, first_tile_idx=0, rotation_count=0, allow_rotation=True, distinct=True, transposition_capacity=0, forward_checking=forward_checking, closed=False, metrics_verbose=None)
+      events = list(_backtrack_subtree(progress_interval=0, **subtree))
+      assert {event[0] for event in events} == {'progress', 'solution', 'done'}
+      for event_idx, event in enumerate(events[:-1]):
+        assert [resumed_event[1] for resumed_event in _backtrack_subtree(path=event[-1], **subtree) if resumed_event[0] == 'solution'] == [later_event[1] for later_event in events[event_idx + 1:] if later_event[0] == 'solution']
+    # an interrupted search resumed from its checkpoint finds the same solutions, skipping the subtrees done before
+    # and going on from where it was in the subtree it was searching
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+      checkpoint_file = os.path.join(checkpoint_dir, 'solve_all.checkpoint')
+      store_file = os.path.join(checkpoint_dir, 'solutions.tpss')
+      subtree_solutions = [sum(event[0] == 'solution' for event in _backtrack_subtree(tiles=puzzle.tiles, first_tile_idx=first_tile_idx, rotation_count=rotation_count, allow_rotation=True, distinct=True, transposition_capacity=0, forward_checking=False, closed=False, metrics_verbose=None)) for (first_tile_idx, rotation_count) in puzzle._first_placements(allow_rotation=True, distinct=True)]
+      assert subtree_solutions[3] > 2
+      interrupt_after(puzzle=puzzle, event_count=sum(subtree_solutions[0:3]) + 2, kind='solution')
+      try:
+        puzzle.solve_all(allow_rotation=True, store_file=store_file, checkpoint_file=checkpoint_file)
+        assert False
+      except KeyboardInterrupt:
+        pass
+      interrupted = SearchCheckpoint.open(path=checkpoint_file, run={}, resume=True)
+      assert interrupted.done_subtrees == {0, 1, 2} and list(interrupted.subtree_paths) == [3]
+      assert interrupted.store_records == sum(subtree_solutions[0:3]) + 2
+      # a run killed after its last checkpoint got to store more solutions, those are not stored twice on resume
+      with SolutionWriter(path=store_file, tile_count=len(puzzle.tiles)) as solution_writer:
+        solution_writer.append(solution=puzzle._compact_moves(moves=solutions[-1]))
+      puzzle.enable_metrics()
+      assert puzzle.solve_all(allow_rotation=True, workers=2, store_file=store_file, checkpoint_file=checkpoint_file, resume=True) is None
+      # stored in the order the subtrees searched in parallel finished them
+      with SolutionReader(path=store_file) as reader:
+        assert sorted(Puzzle.canonical_form(moves=puzzle._expand_moves(compact_moves=stored_solution)) for stored_solution in reader) == sorted(Puzzle.canonical_form(moves=solution) for solution in solutions)
+      assert puzzle.metrics.nodes_expanded < serial_counters['nodes_expanded']
+      # a finished search resumes without searching again
+      puzzle.enable_metrics()
+      assert puzzle.solve_all(allow_rotation=True, store_file=store_file, checkpoint_file=checkpoint_file, resume=True) is None
+      assert puzzle.metrics.nodes_expanded == 0
+      with SolutionReader(path=store_file) as reader:
+        assert len(reader) == len(solutions)
+      puzzle._metrics = None
+      for (allow_rotation, resumed_store_file) in [(False, store_file), (True, None)]:
+        try:
+          puzzle.solve_all(allow_rotation=allow_rotation, store_file=resumed_store_file, checkpoint_file=checkpoint_file, resume=True)
+          assert False
+        except ValueError:
+          pass
+    # the search runs on its own puzzles and leaves this one untouched
+    assert len(puzzle.placed_tiles) == 0
+    # tile positions belong to the puzzle, another puzzle over the same tiles in another order leaves them alone
+    puzzle.reset()
+    assert puzzle.place_tile(tile=tile_3, rotation_count=0, coord=Puzzle.FIRST_TILE_COORD) is True
+    Puzzle(tiles=[tile_3, tile_2, tile_1])
+    assert puzzle.placed_tiles == {2: Puzzle.FIRST_TILE_COORD} and puzzle.remaining_tiles() == [tile_1, tile_2]
+    puzzle.undo()
+    # every solution can be replayed move by move
+    for solution in solutions:
+      puzzle.reset()
+      for move in solution:
+        assert puzzle.place_tile(tile=move.tile, rotation_count=move.rotation_count, coord=move.coord) is True
+        assert puzzle.remaining_tiles() == [tile for tile_idx, tile in enumerate(puzzle.tiles) if tile_idx not in puzzle.placed_tiles]
+      assert len(puzzle.remaining_tiles()) == 0
+      puzzle.undo()
+      assert puzzle.remaining_tiles() == [solution[-1].tile]
+
+    # with an identical tile added, the identical tiles are placed in the order of the list so no solution is found
+    # with them swapped, without keeping the canonical forms of the solutions found
+    puzzle.add_tile(tile=Tile(*tile_3.original_orientation))
+    assert puzzle._distinct_options(allow_rotation=True)[1] is False
+    twin_solutions = puzzle.solve_all(allow_rotation=True)
+    twin_forms = {Puzzle.canonical_form(moves=solution) for solution in twin_solutions}
+    assert len(twin_forms) == len(twin_solutions)
+    # kept symmetric, each turns up once per quarter turn and per order of the identical tiles
+    assert len(puzzle.solve_all(allow_rotation=True, distinct=False)) == 8 * len(twin_solutions)
+    assert {Puzzle.canonical_form(moves=solution) for solution in puzzle.solve_all(allow_rotation=True, transposition_capacity=1024)} == twin_forms
+    # the swapped partial boards proven dead are skipped without losing any solution
+    assert {Puzzle.canonical_form(moves=solution) for solution in puzzle.solve_all(allow_rotation=True, distinct=False, transposition_capacity=1024)} == twin_forms
+    assert puzzle.transposition_stats['hits'] > 0
+    # forward checking prunes branches but finds the same solutions
+    assert {Puzzle.canonical_form(moves=solution) for solution in puzzle.solve_all(allow_rotation=True, forward_checking=True)} == twin_forms
+
+    # a road loop of 4 corners is the only way to close every edge
+    road = lambda direction: Connection(color=Color.BEIGE, direction=direction, connector=Connector.ROAD)
+    puzzle = Puzzle()
+    puzzle.add_tile(tile=Tile(north=None, east=road(Direction.EAST), south=road(Direction.SOUTH), west=None))
+    puzzle.add_tile(tile=Tile(north=None, east=None, south=road(Direction.SOUTH), west=road(Direction.WEST)))
+    puzzle.add_tile(tile=Tile(north=road(Direction.NORTH), east=road(Direction.EAST), south=None, west=None))
+    puzzle.add_tile(tile=Tile(north=road(Direction.NORTH), east=None, south=None, west=road(Direction.WEST)))
+    closed_forms = {Puzzle.canonical_form(moves=solution) for solution in puzzle.solve_all(allow_rotation=True, closed=True)}
+    assert len(closed_forms) == 1
+    assert closed_forms < {Puzzle.canonical_form(moves=solution) for solution in puzzle.solve_all(allow_rotation=True)}
+    assert {Puzzle.canonical_form(moves=solution) for solution in puzzle.solve_all(allow_rotation=True, closed=True, forward_checking=True)} == closed_forms
+
+    # purple heads on every side can never face each other
+    puzzle = Puzzle()
+    for _ in range(0, 2):
+      puzzle.add_tile(tile=Tile(
+        north=Connection(color=Color.PURPLE, direction=Direction.NORTH, connector=Connector.HEAD),
+        east=Connection(color=Color.PURPLE, direction=Direction.EAST, connector=Connector.HEAD),
+        south=Connection(color=Color.PURPLE, direction=Direction.SOUTH, connector=Connector.HEAD),
+        west=Connection(color=Color.PURPLE, direction=Direction.WEST, connector=Connector.HEAD)
+      ))
+    assert puzzle.solve_all(allow_rotation=True) == []
+
+  def test_long_chain():
+    # a road longer than 20 tiles runs past the edge of the old fixed size board
+    puzzle = Puzzle()
+    for _ in range(0, 30):
+      puzzle.add_tile(tile=Tile(
+        north=None,
+        east=Connection(color=Color.BEIGE, direction=Direction.EAST, connector=Connector.ROAD),
+        south=None,
+        west=Connection(color=Color.BEIGE, direction=Direction.WEST, connector=Connector.ROAD)
+      ))
+
+    solution = puzzle._greedy(first_tile=puzzle.tiles[0], allow_rotation=False, rng=random.Random(0))
+    assert len(solution) == 30
+    ((min_row, min_col), (max_row, max_col)) = puzzle.board.bounding_box
+    assert max_row == min_row
+    assert max_col - min_col == 29
+
+  def test_undo_next_moves():
+    from tile_generator import generate_tiles
+
+    tile_a = Tile(north=None, east=Connection(color=Color.RED, direction=Direction.EAST, connector=Connector.HEAD), south=None, west=None)
+    tile_b = Tile(north=None, east=None, south=None, west=Connection(color=Color.RED, direction=Direction.WEST, connector=Connector.TAIL))
+    tile_c = Tile(north=Connection(color=Color.BEIGE, direction=Direction.NORTH, connector=Connector.ROAD), east=None, south=None, west=None)
+    puzzle = Puzzle(tiles=[tile_a, tile_b, tile_c])
+    puzzle.reset()
+    puzzle._push_tile(tile=tile_a, rotation_count=0, coord=Puzzle.FIRST_TILE_COORD)
+    puzzle._push_tile(tile=tile_b, rotation_count=0, coord=(21, 20))
+    # east of tile_a is dead while tile_b is placed elsewhere, and fits it again once tile_b is taken back
+    puzzle.next_moves()
+    assert (20, 21) not in puzzle.allowed_coords
+    puzzle.undo()
+    assert (20, 21) in puzzle.allowed_coords
+    assert puzzle.next_moves()[0] == Puzzle.HEAD_TAIL_SCORE
+    assert puzzle.place_tile(tile=tile_b, rotation_count=0, coord=(20, 21)) is True
+
+    # a board brought back by undoing offers the same moves as the same board built from scratch
+    (tiles, _) = generate_tiles(count=28, seed=5)
+    puzzle = Puzzle(tiles=tiles)
+    puzzle.reset()
+    puzzle._push_tile(tile=tiles[0], rotation_count=0, coord=Puzzle.FIRST_TILE_COORD)
+    rng = random.Random(5)
+    for _ in range(0, 300):
+      (score, moves) = puzzle.next_moves(allow_rotation=True)
+      fresh_puzzle = puzzle.replay(moves=puzzle.placed_moves())
+      assert fresh_puzzle.next_moves(allow_rotation=True) == (score, moves)
+      if score > 0 and (len(puzzle.placed_tiles) < 2 or rng.random() < 0.6):
+        move = rng.choice(moves)
+        puzzle._push_tile(tile=move.tile, rotation_count=move.rotation_count, coord=move.coord)
+      elif len(puzzle.placed_tiles) > 1:
+        puzzle.undo()
+
+  def test_deepest_first():
+    from tile_generator import generate_tiles
+
+    # the greedy search dead-ends from this first tile, deepest first backs out of the dead end in a few expansions
+    (tiles, _) = generate_tiles(count=60, seed=3)
+    puzzle = Puzzle(tiles=tiles)
+    assert puzzle._greedy(first_tile=tiles[26], allow_rotation=True, rng=random.Random(26)) is None
+    puzzle.enable_metrics()
+    solution = puzzle._deepest_first(first_tile=tiles[26], allow_rotation=True)
+    assert solution is not None and puzzle.metrics.nodes_expanded < 4 * len(tiles)
+    puzzle.reset()
+    for move in solution:
+      assert puzzle.place_tile(tile=move.tile, rotation_count=move.rotation_count, coord=move.coord) is True
+    assert len(puzzle.remaining_tiles()) == 0
+    # a capped heap still gets there, budgets stop it
+    assert puzzle._deepest_first(first_tile=tiles[26], allow_rotation=True, max_open=8) is not None
+    assert puzzle._deepest_first(first_tile=tiles[26], allow_rotation=True, max_open=1, max_nodes=None) is not None
+    assert puzzle._deepest_first(first_tile=tiles[26], allow_rotation=True, max_nodes=10) is None
+    assert puzzle._deepest_first(first_tile=tiles[26], allow_rotation=True, deadline=time.monotonic()) is None
+    # solves from every first tile the greedy search solves from, and more
+    greedy_solved = {first_tile_idx for first_tile_idx in range(20, 30) if _greedy_subtree(tiles=tiles, first_tile_idx=first_tile_idx, allow_rotation=True, seed=first_tile_idx)[0] is not None}
+    deepest_first_solved = {first_tile_idx for first_tile_idx in range(20, 30) if _greedy_subtree(tiles=tiles, first_tile_idx=first_tile_idx, allow_rotation=True, seed=first_tile_idx, deepest_first=True)[0] is not None}
+    assert greedy_solved < deepest_first_solved
+    assert len(Puzzle(tiles=tiles).solve(allow_rotation=True, seed=3, workers=2, deepest_first=True)) > 0
+
+  def test_shared_tiles():
+    from tile_generator import generate_tiles
+
+    # tiles never turn, searches and replays over the same tiles leave the board of this puzzle as it is
+    (tiles, _) = generate_tiles(count=28, seed=5)
+    (moves, score) = Puzzle(tiles=tiles).solve_anytime(allow_rotation=True, seed=5)
+    puzzle = Puzzle(tiles=tiles).replay(moves=moves)
+    board = dict(puzzle.board)
+    puzzle.solve_anytime(allow_rotation=True, seed=6)
+    puzzle.replay(moves=[Puzzle.Move(tile=move.tile, rotation_count=move.rotation_count + 1, coord=move.coord) for move in moves])
+    _greedy_subtree(tiles=tiles, first_tile_idx=3, allow_rotation=True, seed=6)
+    assert dict(puzzle.board) == board
+    assert puzzle.placed_moves() == moves and puzzle.layout_score() == score
+
+  tests()
+  test_solve()
   test_solve_with_rotation()
+  test_solve_all()
+  test_long_chain()
+  test_undo_next_moves()
+  test_deepest_first()
+  test_shared_tiles()
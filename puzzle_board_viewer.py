@@ -1,10 +1,11 @@
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
 
 from enums import Color, Direction, Connector
 from connection import Connection
-from tile import Tile
+from tile import Tile, PlacedTile
+from board import Board
 
 TILE_SIZE_HALF_UNIT = 5
 TILE_SIZE_UNIT = 10
@@ -12,27 +13,58 @@ TILE_SIZE = TILE_SIZE_UNIT * 4
 IMAGE_BACKGROUND = 'whitesmoke'
 VISUAL_COLORS = ['black', 'mediumblue', 'gold', 'lime', 'crimson', 'darkorange', 'darkviolet', 'khaki', 'orchid']
 VISUAL_CONNECTORS = ['', 'H', 'T', '']
-FONT = ImageFont.truetype(font='SFNSMono.ttf', size=10)
-COORD_FONT = ImageFont.truetype(font='SFNSMono.ttf', size=8)
+FONT_SIZE = 10
+COORD_FONT_SIZE = 8
+# tried in order, the first one found is used, PIL's own bitmap font otherwise
+FONT_FILES = ['SFNSMono.ttf', 'DejaVuSansMono.ttf']
+
+# font size: font, loaded on first use
+_FONTS: Dict[int, ImageFont.ImageFont] = {}
+# (edge codes, rotation count): (tile image, connections image), drawn once per look of a tile
+_SPRITES: Dict[Tuple[Tuple[int, int, int, int], int], Tuple[Image.Image, Image.Image]] = {}
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+  font = _FONTS.get(size)
+  if font is None:
+    for font_file in FONT_FILES:
+      try:
+        font = ImageFont.truetype(font=font_file, size=size)
+        break
+      except OSError:
+        continue
+    else:
+      font = ImageFont.load_default()
+    _FONTS[size] = font
+
+  return font
 
 
 def _draw_connector(drawing: ImageDraw, rect_points: List[Tuple[int, int]], rect_fill: str, connector_text_point: Tuple[int, int], connector_text: str) -> None:
   drawing.rectangle(rect_points, fill=rect_fill)
-  drawing.text(connector_text_point, connector_text, fill=VISUAL_COLORS[0], font=FONT)
-
-
-def _draw_tile(top_left: Tuple[int, int], tile: Tile, drawing: ImageDraw, coord: Tuple[int, int]) -> None:
-  xy = [
-    top_left,
-    (top_left[0] + TILE_SIZE, top_left[1] + TILE_SIZE)
-  ]
-  # draw the tile rectangle
-  drawing.rectangle(xy, fill=IMAGE_BACKGROUND, outline=VISUAL_COLORS[0])
-  # draw coord
-  drawing.text(top_left, str(coord), fill=VISUAL_COLORS[0], font=COORD_FONT)
-  # draw rotation count
-  drawing.text((top_left[0] + TILE_SIZE // 2, top_left[1] + TILE_SIZE // 2), str(tile.rotation_count), fill=VISUAL_COLORS[-1], font=COORD_FONT)
-  # draw connections
+  drawing.text(connector_text_point, connector_text, fill=VISUAL_COLORS[0], font=_font(size=FONT_SIZE))
+
+
+def _tile_sprites(tile: PlacedTile) -> Tuple[Image.Image, Image.Image]:
+  # the tile with its rotation count, and its connections on a transparent image to go over the coord label
+  key = (tile.edge_codes, tile.rotation_count)
+  sprites = _SPRITES.get(key)
+  if sprites is None:
+    tile_image = Image.new(mode='RGB', size=(TILE_SIZE + 1, TILE_SIZE + 1), color=IMAGE_BACKGROUND)
+    drawing = ImageDraw.Draw(tile_image)
+    # draw the tile rectangle
+    drawing.rectangle([(0, 0), (TILE_SIZE, TILE_SIZE)], fill=IMAGE_BACKGROUND, outline=VISUAL_COLORS[0])
+    # draw rotation count
+    drawing.text((TILE_SIZE // 2, TILE_SIZE // 2), str(tile.rotation_count), fill=VISUAL_COLORS[-1], font=_font(size=COORD_FONT_SIZE))
+
+    connections_image = Image.new(mode='RGBA', size=(TILE_SIZE + 1, TILE_SIZE + 1), color=(0, 0, 0, 0))
+    _draw_connections(top_left=(0, 0), tile=tile, drawing=ImageDraw.Draw(connections_image))
+    sprites = _SPRITES[key] = (tile_image, connections_image)
+
+  return sprites
+
+
+def _draw_connections(top_left: Tuple[int, int], tile: PlacedTile, drawing: ImageDraw) -> None:
   connection_rect_top_left = None
   connection_rect_bottom_right = None
   connection_rect_fill = ''
@@ -105,20 +137,23 @@ def _draw_tile(top_left: Tuple[int, int], tile: Tile, drawing: ImageDraw, coord:
     )
 
 
-def view_board(board: List[List[Tile]], output_file: str = None) -> None:
+def view_board(board: Board, output_file: str = None) -> None:
+  # only the bounding box of the placed tiles is drawn
+  ((min_row, min_col), (max_row, max_col)) = board.bounding_box or ((0, 0), (0, 0))
   board_image = Image.new(
     mode='RGB',
-    size=(len(board) * TILE_SIZE, len(board[0]) * TILE_SIZE),
+    size=((max_col - min_col + 1) * TILE_SIZE, (max_row - min_row + 1) * TILE_SIZE),
     color=IMAGE_BACKGROUND
   )
   drawing = ImageDraw.Draw(board_image)
   # (0, 0) is the top left corner of the image
-  for row_idx, row in enumerate(board):
-    vertical_start = TILE_SIZE * row_idx
-    for tile_idx, tile in enumerate(row):
-      if tile is not None:
-        horizontal_start = TILE_SIZE * tile_idx
-        _draw_tile(top_left=(horizontal_start, vertical_start), tile=tile, drawing=drawing, coord=(row_idx, tile_idx))
+  for (row_idx, tile_idx), tile in board.items():
+    top_left = (TILE_SIZE * (tile_idx - min_col), TILE_SIZE * (row_idx - min_row))
+    (tile_image, connections_image) = _tile_sprites(tile=tile)
+    board_image.paste(tile_image, top_left)
+    # draw coord
+    drawing.text(top_left, str((row_idx, tile_idx)), fill=VISUAL_COLORS[0], font=_font(size=COORD_FONT_SIZE))
+    board_image.paste(connections_image, top_left, mask=connections_image)
 
   if output_file is None:
     board_image.show()
@@ -155,4 +190,17 @@ if __name__ == '__main__':
     west=Connection(color=Color.RED, direction=Direction.WEST, connector=Connector.HEAD)
   )
 
-  view_board(board=[[tile_1, tile_2], [tile_3, tile_4]])
+  board = Board()
+  for coord, tile in [((0, 0), tile_1), ((0, 1), tile_2), ((1, 0), tile_3), ((1, 1), tile_4)]:
+    board[coord] = PlacedTile(tile=tile, rotation_count=0)
+
+  # a tile drawn again in the same rotation reuses its sprites
+  assert _tile_sprites(tile=board[(0, 0)]) is _tile_sprites(tile=PlacedTile(tile=tile_1, rotation_count=0))
+  assert _tile_sprites(tile=PlacedTile(tile=tile_1, rotation_count=1)) is not _tile_sprites(tile=board[(0, 0)])
+  assert len(_SPRITES) == 2
+  # with none of the font files around, PIL's own font is used
+  FONT_FILES.insert(0, 'missing-font.ttf')
+  _FONTS.clear()
+  assert _font(size=FONT_SIZE) is not None
+
+  view_board(board=board)
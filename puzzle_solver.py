@@ -1,9 +1,18 @@
 from typing import List
+import argparse
+import signal
+import sys
 
 from enums import Color, Direction, Connector
 from connection import Connection
 from tile import Tile
 from puzzle import Puzzle
+from checkpoint import SearchCheckpoint
+from solution_store import SolutionReader
+
+DEFAULT_CHECKPOINT_FILE = 'puzzle_solver.checkpoint'
+# where a checkpointed run keeps its solutions without --store
+DEFAULT_STORE_FILE = 'puzzle_solver.tpss'
 
 
 def _tiles() -> List[Tile]:
@@ -266,12 +275,43 @@ def _tiles() -> List[Tile]:
   return tile_pieces
 
 
-def run():
+def run(argv: List[str] = None):
+  parser = argparse.ArgumentParser(description='solves the Domino Road puzzle')
+  parser.add_argument('--all', action='store_true', help='enumerate every distinct solution instead of the greedy search')
+  parser.add_argument('--workers', type=int, default=1)
+  parser.add_argument('--seed', type=int, help='seed of the greedy search')
+  parser.add_argument('--beam-width', type=int, default=1, help='boards kept at every step of the greedy search, more find more solutions but take longer')
+  parser.add_argument('--deepest-first', action='store_true', help='back out of the dead ends of the greedy search to the deepest board left, the best scoring one first')
+  parser.add_argument('--store', help=f"append the solutions to this solution store file, {DEFAULT_STORE_FILE} by default when checkpointing")
+  parser.add_argument('--checkpoint', help='save the progress to this file')
+  parser.add_argument('--checkpoint-interval', type=float, default=SearchCheckpoint.DEFAULT_INTERVAL, help='seconds between checkpoints')
+  parser.add_argument('--resume', action='store_true', help=f"go on from the checkpoint file, {DEFAULT_CHECKPOINT_FILE} by default")
+  args = parser.parse_args(argv)
+
   puzzle = Puzzle()
   for tile in _tiles():
     puzzle.add_tile(tile=tile)
 
-  puzzle.solve(export_board=True, allow_rotation=True)
+  checkpoint_file = args.checkpoint
+  if checkpoint_file is None and args.resume:
+    checkpoint_file = DEFAULT_CHECKPOINT_FILE
+  store_file = args.store
+  if checkpoint_file is not None:
+    if store_file is None:
+      store_file = DEFAULT_STORE_FILE
+    # a terminated run, e.g. by a restart, unwinds like an interrupted one and saves its checkpoint on the way out
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit(128 + signal_number))
+
+  if args.all:
+    solutions = puzzle.solve_all(allow_rotation=True, workers=args.workers, store_file=store_file, checkpoint_file=checkpoint_file, resume=args.resume, checkpoint_interval=args.checkpoint_interval)
+    if solutions is None:
+      # the solutions only went to the store
+      with SolutionReader(path=store_file) as reader:
+        print(f"✅ {len(reader)} solutions in {store_file}")
+    else:
+      print(f"✅ {len(solutions)} solutions")
+  else:
+    puzzle.solve(export_board=True, allow_rotation=True, workers=args.workers, seed=args.seed, beam_width=args.beam_width, deepest_first=args.deepest_first, store_file=store_file, checkpoint_file=checkpoint_file, resume=args.resume, checkpoint_interval=args.checkpoint_interval)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from typing import Callable, Iterator, List, Tuple
+import mmap
+import os
+
+from enums import Color, Connector, Direction
+from connection import Connection
+from tile import Tile
+from board import Board
+from export_queue import snapshot_board
+
+# a solution is a list of (tile position, rotation count, coord) compact moves placing every tile
+CompactSolution = List[Tuple[int, int, Tuple[int, int]]]
+
+
+class SolutionStore:
+  # append only file of solutions, after the header every record has the same size
+  # a record holds per tile, in tile order, its rotation count (2 bits) and its row and col relative to the top left
+  # of the solution, each coord_bits wide
+  MAGIC = b'TPSS'
+  VERSION = 1
+  # magic, version, tile count (2 bytes), coord bits
+  HEADER_SIZE = 8
+
+  def __init__(self, tile_count: int):
+    self._tile_count = tile_count
+    # a layout of n tiles spans at most n rows or cols
+    self._coord_bits = max(1, (tile_count - 1).bit_length())
+    self._tile_bytes = (2 + 2 * self._coord_bits + 7) // 8
+    self._record_size = tile_count * self._tile_bytes
+
+  @property
+  def tile_count(self) -> int:
+    return self._tile_count
+
+  @property
+  def record_size(self) -> int:
+    return self._record_size
+
+  def header(self) -> bytes:
+    return SolutionStore.MAGIC + bytes([SolutionStore.VERSION]) + self._tile_count.to_bytes(2, 'little') + bytes([self._coord_bits])
+
+  @classmethod
+  def from_header(cls, header: bytes) -> SolutionStore:
+    if len(header) < SolutionStore.HEADER_SIZE or header[0:4] != SolutionStore.MAGIC or header[4] != SolutionStore.VERSION:
+      raise ValueError('not a solution store file')
+
+    return SolutionStore(tile_count=int.from_bytes(header[5:7], 'little'))
+
+  def encode(self, solution: CompactSolution) -> bytes:
+    if len(solution) != self._tile_count:
+      raise ValueError(f"a solution places all {self._tile_count} tiles, not {len(solution)}")
+
+    min_row = min(coord[0] for (_, _, coord) in solution)
+    min_col = min(coord[1] for (_, _, coord) in solution)
+    fields = [0] * self._tile_count
+    for (tile_idx, rotation_count, (row, col)) in solution:
+      fields[tile_idx] = (((row - min_row) << self._coord_bits | (col - min_col)) << 2) | rotation_count
+
+    return b''.join(field.to_bytes(self._tile_bytes, 'little') for field in fields)
+
+  def decode(self, record: bytes) -> CompactSolution:
+    coord_mask = (1 << self._coord_bits) - 1
+    solution = []
+    for tile_idx in range(0, self._tile_count):
+      field = int.from_bytes(record[tile_idx * self._tile_bytes:(tile_idx + 1) * self._tile_bytes], 'little')
+      solution.append((tile_idx, field & 3, ((field >> (2 + self._coord_bits)) & coord_mask, (field >> 2) & coord_mask)))
+
+    return solution
+
+
+class SolutionWriter:
+  # appends solutions to a store file, creating it with its header first
+  # with a record_count, the records past the first record_count are dropped, e.g. the ones stored after a checkpoint
+  def __init__(self, path: str, tile_count: int, record_count: int = None):
+    self._store = SolutionStore(tile_count=tile_count)
+    self._file = open(path, 'ab')
+    self._count = 0
+    if self._file.tell() == 0:
+      self._file.write(self._store.header())
+    else:
+      with open(path, 'rb') as existing_file:
+        if existing_file.read(SolutionStore.HEADER_SIZE) != self._store.header():
+          self._file.close()
+          raise ValueError(f"{path} holds solutions of another tile set")
+      # a record cut short by a crashed writer is dropped, the next ones would be out of alignment after it
+      self._count = (self._file.tell() - SolutionStore.HEADER_SIZE) // self._store.record_size
+      if record_count is not None:
+        self._count = min(self._count, record_count)
+      self._file.truncate(SolutionStore.HEADER_SIZE + self._count * self._store.record_size)
+
+  def __len__(self) -> int:
+    return self._count
+
+  def append(self, solution: CompactSolution) -> None:
+    self._file.write(self._store.encode(solution=solution))
+    self._count += 1
+
+  def flush(self) -> None:
+    # the solutions appended so far are in the file, e.g. before a checkpoint counts them
+    self._file.flush()
+
+  def close(self) -> None:
+    self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    self.close()
+
+
+class SolutionReader:
+  # random access to the solutions of a store file through a memory map, nothing is read until asked for
+  def __init__(self, path: str):
+    self._file = open(path, 'rb')
+    self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) > 0 else None
+    self._store = SolutionStore.from_header(header=b'' if self._mmap is None else self._mmap[0:SolutionStore.HEADER_SIZE])
+    # a record cut short by a crashed writer is left out
+    self._count = (len(self._mmap) - SolutionStore.HEADER_SIZE) // self._store.record_size
+
+  @property
+  def tile_count(self) -> int:
+    return self._store.tile_count
+
+  def __len__(self) -> int:
+    return self._count
+
+  def __getitem__(self, solution_idx: int) -> CompactSolution:
+    if solution_idx < 0:
+      solution_idx += self._count
+    if not 0 <= solution_idx < self._count:
+      raise IndexError(solution_idx)
+
+    start = SolutionStore.HEADER_SIZE + solution_idx * self._store.record_size
+    return self._store.decode(record=self._mmap[start:start + self._store.record_size])
+
+  def __iter__(self) -> Iterator[CompactSolution]:
+    for solution_idx in range(0, self._count):
+      yield self[solution_idx]
+
+  def filter(self, predicate: Callable[[CompactSolution], bool]) -> Iterator[int]:
+    # indices of the solutions the predicate holds for
+    for solution_idx in range(0, self._count):
+      if predicate(self[solution_idx]):
+        yield solution_idx
+
+  def board(self, solution_idx: int, tiles: List[Tile]) -> Board:
+    # the solution on a board of its own tiles, e.g. for view_board
+    return snapshot_board(placements=[(tiles[tile_idx], rotation_count, coord) for (tile_idx, rotation_count, coord) in self[solution_idx]])
+
+  def close(self) -> None:
+    if self._mmap is not None:
+      self._mmap.close()
+    self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    self.close()
+
+
+if __name__ == '__main__':
+  import tempfile
+
+  tile_1 = Tile(
+    north=None,
+    east=Connection(color=Color.RED, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.PURPLE, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  tile_2 = Tile(
+    north=None,
+    east=Connection(color=Color.PURPLE, direction=Direction.EAST, connector=Connector.TAIL),
+    south=None,
+    west=Connection(color=Color.YELLOW, direction=Direction.WEST, connector=Connector.HEAD)
+  )
+
+  # 2 bits of rotation and 2 coords of 5 bits fit in 2 bytes a tile
+  store = SolutionStore(tile_count=28)
+  assert store.record_size == 56
+  solution = [(tile_idx, tile_idx % 4, (20 + tile_idx, 20 - tile_idx)) for tile_idx in range(0, 28)]
+  assert store.decode(record=store.encode(solution=solution)) == [(tile_idx, tile_idx % 4, (tile_idx, 27 - tile_idx)) for tile_idx in range(0, 28)]
+
+  with tempfile.TemporaryDirectory() as store_dir:
+    path = os.path.join(store_dir, 'solutions.tpss')
+    with SolutionWriter(path=path, tile_count=2) as writer:
+      writer.append(solution=[(1, 0, (20, 19)), (0, 0, (20, 20))])
+    # appending goes on after the solutions already stored
+    with SolutionWriter(path=path, tile_count=2) as writer:
+      writer.append(solution=[(0, 1, (20, 20)), (1, 3, (21, 20))])
+    # a crash in the middle of a record leaves part of it behind
+    with open(path, 'ab') as store_file:
+      store_file.write(b'\x01')
+    with SolutionWriter(path=path, tile_count=2) as writer:
+      assert len(writer) == 2
+      writer.append(solution=[(0, 2, (20, 20)), (1, 1, (20, 21))])
+    # a resumed search drops the solutions it stored after its checkpoint
+    with SolutionWriter(path=path, tile_count=2) as writer:
+      writer.append(solution=[(0, 0, (20, 20)), (1, 0, (20, 21))])
+    with SolutionWriter(path=path, tile_count=2, record_count=3) as writer:
+      assert len(writer) == 3
+    try:
+      SolutionWriter(path=path, tile_count=3)
+      assert False
+    except ValueError:
+      pass
+
+    with SolutionReader(path=path) as reader:
+      assert len(reader) == 3
+      assert reader[0] == [(0, 0, (0, 1)), (1, 0, (0, 0))]
+      assert reader[2] == [(0, 2, (0, 0)), (1, 1, (0, 1))]
+      assert list(reader) == [reader[0], reader[1], reader[-1]]
+      assert list(reader.filter(predicate=lambda stored_solution: stored_solution[1][1] == 3)) == [1]
+      board = reader.board(solution_idx=1, tiles=[tile_1, tile_2])
+      assert board.bounding_box == ((0, 0), (1, 0))
+      assert board[(1, 0)].rotation_count == 3 and board[(1, 0)].tile is tile_2
@@ -1,99 +1,139 @@
 from __future__ import annotations
 
 from typing import Tuple
-import copy
-import uuid
+import itertools
 
 from enums import Color, Connector, Direction
 from connection import Connection
 
 
 class Tile:
+  # ids are unique within the process and only tell tiles apart when printed, puzzles keep their own tile positions
+  # a tile never turns, its edges are the unrotated ones and a PlacedTile holds the rotation it lies in on a board
+  _IDS = itertools.count()
+
   def __init__(self, north: Connection, east: Connection, south: Connection, west: Connection):
-    self._id = str(uuid.uuid4())
-    self._north = north
-    self._east = east
-    self._south = south
-    self._west = west
-    self._rotation_count = 0
-    self._original_orientation = (copy.deepcopy(self._north), copy.deepcopy(self._east), copy.deepcopy(self._south), copy.deepcopy(self._west))
+    self._id = next(Tile._IDS)
+    self._orientations = Tile._compute_orientations(edges=(north, east, south, west))
+    self._orientation_codes = tuple(tuple(Connection.edge_code(conn=edge) for edge in orientation) for orientation in self._orientations)
+
+  @staticmethod
+  def _compute_orientations(edges: Tuple[Connection, Connection, Connection, Connection]) -> Tuple[Tuple[Connection, Connection, Connection, Connection], ...]:
+    # all 4 orientations are computed once, index i is the tile rotated i times 90 degrees clockwise
+    orientations = [edges]
+    for _ in range(0, 3):
+      (north, east, south, west) = orientations[-1]
+      orientations.append(tuple(None if edge is None else edge.rotated() for edge in (west, north, east, south)))
+
+    return tuple(orientations)
 
   @property
-  def id(self) -> str:
+  def id(self) -> int:
     return self._id
 
   @property
   def north(self) -> Connection:
-    return self._north
+    return self._orientations[0][0]
 
   @property
   def east(self) -> Connection:
-    return self._east
+    return self._orientations[0][1]
 
   @property
   def south(self) -> Connection:
-    return self._south
+    return self._orientations[0][2]
 
   @property
   def west(self) -> Connection:
-    return self._west
+    return self._orientations[0][3]
 
   @property
   def original_orientation(self) -> Tuple[Connection, Connection, Connection, Connection]:
-    return self._original_orientation
+    return self._orientations[0]
 
   @property
-  def rotation_count(self) -> int:
-    return self._rotation_count
+  def orientations(self) -> Tuple[Tuple[Connection, Connection, Connection, Connection], ...]:
+    return self._orientations
+
+  @property
+  def edge_codes(self) -> Tuple[int, int, int, int]:
+    # integer encoded unrotated (north, east, south, west) edges
+    return self._orientation_codes[0]
 
   def __eq__(self, other: Tile) -> bool:
-    return self.id.__eq__(other.id)
+    # tiles with the same edges are still different tiles
+    return self is other
 
   def __hash__(self):
-    return hash(self.id)
+    return id(self)
 
   def __repr__(self) -> str:
-    return f"Tile({self.id}) [{','.join(map(lambda c: c.__repr__(), self._original_orientation))}]"
+    return f"Tile({self.id}) [{','.join(map(lambda c: c.__repr__(), self.original_orientation))}]"
 
   def __str__(self) -> str:
-    return f"Tile({self.id}) <🌀{self.rotation_count}> [{self.north}, {self.east}, {self.south}, {self.west}]"
+    return f"Tile({self.id}) [{self.north}, {self.east}, {self.south}, {self.west}]"
 
   def can_connect(self, self_edge: Connection, tile: Tile, tile_edge: Connection) -> bool:
-    return self_edge is not None and \
-      self_edge.is_color_matching(conn=tile_edge) and \
-      self_edge.is_connector_matching(conn=tile_edge) and \
-      self_edge.is_direction_matching(conn=tile_edge) or (self_edge is None and tile_edge is None)
-
-  def rotate(self) -> None:
-    # rotate 90 degrees clockwise each time
-    temp_east = self.east
-    if self._north is not None:
-      self._north.rotate()
-    self._east = self._north
-
-    temp_south = self.south
-    if temp_east is not None:
-      temp_east.rotate()
-    self._south = temp_east
-
-    temp_west = self.west
-    if temp_south is not None:
-      temp_south.rotate()
-    self._west = temp_south
-
-    if temp_west is not None:
-      temp_west.rotate()
-    self._north = temp_west
-
-    self._rotation_count += 1
-
-  def reset(self):
-    (original_north, original_east, original_south, original_west) = self.original_orientation
-    self._north = copy.deepcopy(original_north)
-    self._east = copy.deepcopy(original_east)
-    self._south = copy.deepcopy(original_south)
-    self._west = copy.deepcopy(original_west)
-    self._rotation_count = 0
+    return Connection.is_compatible_code(code_1=Connection.edge_code(conn=self_edge), code_2=Connection.edge_code(conn=tile_edge))
+
+  def orientation(self, rotation_count: int) -> Tuple[Connection, Connection, Connection, Connection]:
+    return self._orientations[rotation_count % 4]
+
+  def orientation_codes(self, rotation_count: int) -> Tuple[int, int, int, int]:
+    return self._orientation_codes[rotation_count % 4]
+
+
+class PlacedTile:
+  # a tile as it lies on a board, turned rotation_count times 90 degrees clockwise, the same tile can lie on many
+  # boards in different rotations at once
+  __slots__ = ('_tile', '_rotation_count', '_edges', '_edge_codes')
+
+  def __init__(self, tile: Tile, rotation_count: int):
+    self._tile = tile
+    self._rotation_count = rotation_count % 4
+    self._edges = tile.orientation(rotation_count=self._rotation_count)
+    self._edge_codes = tile.orientation_codes(rotation_count=self._rotation_count)
+
+  @property
+  def tile(self) -> Tile:
+    return self._tile
+
+  @property
+  def rotation_count(self) -> int:
+    return self._rotation_count
+
+  @property
+  def north(self) -> Connection:
+    return self._edges[0]
+
+  @property
+  def east(self) -> Connection:
+    return self._edges[1]
+
+  @property
+  def south(self) -> Connection:
+    return self._edges[2]
+
+  @property
+  def west(self) -> Connection:
+    return self._edges[3]
+
+  @property
+  def edge_codes(self) -> Tuple[int, int, int, int]:
+    # integer encoded (north, east, south, west) edges in the rotation
+    return self._edge_codes
+
+  def __eq__(self, other: PlacedTile) -> bool:
+    return isinstance(other, PlacedTile) and self._tile is other._tile and self._rotation_count == other._rotation_count
+
+  def __hash__(self):
+    return hash((id(self._tile), self._rotation_count))
+
+  def __repr__(self) -> str:
+    return f"{self._tile.__repr__()} 🌀 {self._rotation_count}"
+
+  def __str__(self) -> str:
+    return f"Tile({self._tile.id}) <🌀{self._rotation_count}> [{self.north}, {self.east}, {self.south}, {self.west}]"
 
 
 if __name__ == '__main__':
@@ -119,8 +159,10 @@ if __name__ == '__main__':
   )
 
   print(tile_1)
-  # check for equality
-  assert tile_1 == tile_2
+  # check for equality, tiles with the same edges are still different tiles
+  assert tile_1 == tile_1
+  assert tile_1 != tile_2
+  assert tile_1.edge_codes == tile_2.edge_codes
   # check for can_connect
   assert tile_1.can_connect(self_edge=tile_1.north, tile=tile_2, tile_edge=tile_2.north) is False
   assert tile_1.can_connect(self_edge=tile_1.north, tile=tile_2, tile_edge=tile_2.south) is False
@@ -129,31 +171,38 @@ if __name__ == '__main__':
   assert tile_1.can_connect(self_edge=tile_1.north, tile=tile_3, tile_edge=tile_3.east) is False
   assert tile_1.can_connect(self_edge=tile_1.north, tile=tile_3, tile_edge=tile_3.west) is False
   assert tile_2.can_connect(self_edge=tile_2.south, tile=tile_3, tile_edge=tile_3.north) is True
-  # check for rotate
-  tile_1.rotate()
-  assert tile_1.north is None
-  assert tile_1.east.direction == Direction.EAST
-  assert tile_1.east.color == Color.GREEN
-  assert tile_1.east.connector == Connector.HEAD
-  assert tile_1.south.direction == Direction.SOUTH
-  assert tile_1.south.color == Color.ORANGE
-  assert tile_1.south.connector == Connector.TAIL
-  assert tile_1.west is None
-  # check for original state
-  assert tile_1.original_orientation[0].color == Color.GREEN
-  assert tile_1.original_orientation[0].connector == Connector.HEAD
-  assert tile_1.original_orientation[0].direction == Direction.NORTH
-  # check for reset and rotate
-  tile_1.reset()
-  tile_1.rotate()
-  assert tile_1.north is None
-  assert tile_1.east.direction == Direction.EAST
-  assert tile_1.east.color == Color.GREEN
-  assert tile_1.east.connector == Connector.HEAD
-  assert tile_1.south.direction == Direction.SOUTH
-  assert tile_1.south.color == Color.ORANGE
-  assert tile_1.south.connector == Connector.TAIL
-  assert tile_1.west is None
+  # check for a placed rotation
+  turned_tile_1 = PlacedTile(tile=tile_1, rotation_count=1)
+  print(turned_tile_1)
+  assert turned_tile_1.tile is tile_1
+  assert turned_tile_1.north is None
+  assert turned_tile_1.east.direction == Direction.EAST
+  assert turned_tile_1.east.color == Color.GREEN
+  assert turned_tile_1.east.connector == Connector.HEAD
+  assert turned_tile_1.south.direction == Direction.SOUTH
+  assert turned_tile_1.south.color == Color.ORANGE
+  assert turned_tile_1.south.connector == Connector.TAIL
+  assert turned_tile_1.west is None
+  # check the tile itself never turns
+  assert tile_1.north.color == Color.GREEN
+  assert tile_1.north.connector == Connector.HEAD
+  assert tile_1.north.direction == Direction.NORTH
+  assert tile_1.north is tile_1.original_orientation[0]
+  # check orientations are precomputed and shared by the placements
+  assert tile_1.orientation(rotation_count=1) == (turned_tile_1.north, turned_tile_1.east, turned_tile_1.south, turned_tile_1.west)
+  other_turned_tile_1 = PlacedTile(tile=tile_1, rotation_count=7)
+  assert other_turned_tile_1.rotation_count == 3
+  assert other_turned_tile_1.west.direction == Direction.WEST
+  assert other_turned_tile_1.west.color == Color.GREEN
+  assert other_turned_tile_1.north.direction == Direction.NORTH
+  assert other_turned_tile_1.north.color == Color.ORANGE
+  assert turned_tile_1.rotation_count == 1 and turned_tile_1 != other_turned_tile_1
+  assert PlacedTile(tile=tile_1, rotation_count=4) == PlacedTile(tile=tile_1, rotation_count=0)
+  assert PlacedTile(tile=tile_1, rotation_count=0) != PlacedTile(tile=tile_2, rotation_count=0)
+  # check integer encoded edges follow the rotation
+  assert tile_1.edge_codes == (tile_1.north.code, tile_1.east.code, Connection.NO_EDGE, Connection.NO_EDGE)
+  assert turned_tile_1.edge_codes == tile_1.orientation_codes(rotation_count=1)
+  assert tile_3.orientation_codes(rotation_count=1) == (Connection.NO_EDGE, Connection.NO_EDGE, tile_3.east.rotated().code, tile_3.south.rotated().code)
   # check original orientation
   assert tile_1.original_orientation[0].direction == Direction.NORTH
   assert tile_1.original_orientation[0].color == Color.GREEN
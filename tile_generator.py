@@ -0,0 +1,108 @@
+from typing import List, Tuple
+import random
+
+from enums import Color, Connector, Direction
+from connection import Connection
+from tile import Tile
+
+# (tile position, rotation count, coord) of every tile in a known solution
+CompactSolution = List[Tuple[int, int, Tuple[int, int]]]
+
+# roads are beige like on the real tiles, heads and tails take any other color
+ARROW_COLORS = [color for color in Color if color != Color.BEIGE]
+SIDE_DIRECTIONS = [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+
+
+def random_layout(count: int, rng: random.Random) -> List[Tuple[int, int]]:
+  # count connected coords grown from (0, 0), each new coord next to a random one already taken
+  coords = [(0, 0)]
+  taken = {(0, 0)}
+  frontier = []
+  frontier_set = set()
+
+  def open_neighbors(coord: Tuple[int, int]) -> None:
+    (row, col) = coord
+    for neighbor_coord in [(row - 1, col), (row, col + 1), (row + 1, col), (row, col - 1)]:
+      if neighbor_coord not in taken and neighbor_coord not in frontier_set:
+        frontier.append(neighbor_coord)
+        frontier_set.add(neighbor_coord)
+
+  open_neighbors(coord=(0, 0))
+  while len(coords) < count:
+    # swap the picked coord to the end to pop it in constant time
+    picked_idx = rng.randrange(0, len(frontier))
+    (frontier[picked_idx], frontier[-1]) = (frontier[-1], frontier[picked_idx])
+    coord = frontier.pop()
+    frontier_set.discard(coord)
+    coords.append(coord)
+    taken.add(coord)
+    open_neighbors(coord=coord)
+
+  return coords
+
+
+def generate_tiles(count: int, seed: int = None, road_ratio: float = 0.3, arrow_ratio: float = 0.4) -> Tuple[List[Tile], CompactSolution]:
+  # a solvable set of count tiles, cut out of a random connected layout where every pair of touching sides gets a road,
+  # a head facing a tail of the same color or nothing, the sides on the outside of the layout get nothing
+  # the tiles come shuffled and turned, the solution tells where each one goes and how it has to be turned
+  rng = random.Random(seed)
+  coords = random_layout(count=count, rng=rng)
+  layout = set(coords)
+  # coord: [north, east, south, west] connections
+  edges = {coord: [None, None, None, None] for coord in coords}
+  for (row, col) in coords:
+    # every pair of touching sides once, from the west or north coord of the pair
+    for (side, neighbor_coord) in [(1, (row, col + 1)), (2, (row + 1, col))]:
+      if neighbor_coord not in layout:
+        continue
+
+      facing_side = (side + 2) % 4
+      draw = rng.random()
+      if draw < road_ratio:
+        (connector, facing_connector, color) = (Connector.ROAD, Connector.ROAD, Color.BEIGE)
+      elif draw < road_ratio + arrow_ratio:
+        (connector, facing_connector) = (Connector.HEAD, Connector.TAIL) if rng.random() < 0.5 else (Connector.TAIL, Connector.HEAD)
+        color = rng.choice(ARROW_COLORS)
+      else:
+        continue
+
+      edges[(row, col)][side] = Connection(connector=connector, color=color, direction=SIDE_DIRECTIONS[side])
+      edges[neighbor_coord][facing_side] = Connection(connector=facing_connector, color=color, direction=SIDE_DIRECTIONS[facing_side])
+
+  order = list(range(0, count))
+  rng.shuffle(order)
+  tiles = [None] * count
+  solution = []
+  for (coord_idx, tile_idx) in enumerate(order):
+    coord = coords[coord_idx]
+    # the tile as it lies in the layout, handed out turned by scramble quarter turns
+    scramble = rng.randrange(0, 4)
+    tiles[tile_idx] = Tile(*Tile(*edges[coord]).orientation(rotation_count=scramble))
+    solution.append((tile_idx, (4 - scramble) % 4, coord))
+
+  solution.sort()
+  return (tiles, solution)
+
+
+if __name__ == '__main__':
+  from puzzle import Puzzle
+
+  layout = random_layout(count=200, rng=random.Random(1))
+  assert len(set(layout)) == 200
+  # every coord after the first touches one before it
+  assert all(any(abs(row - other_row) + abs(col - other_col) == 1 for (other_row, other_col) in layout[:coord_idx]) for coord_idx, (row, col) in enumerate(layout) if coord_idx > 0)
+
+  (tiles, solution) = generate_tiles(count=60, seed=7)
+  assert len(tiles) == 60 and sorted(tile_idx for (tile_idx, _, _) in solution) == list(range(0, 60))
+  assert generate_tiles(count=60, seed=7)[1] == solution
+  # the known solution can be played out tile by tile, each next to one placed before
+  pending = dict(((row + 20, col + 20), (tile_idx, rotation_count)) for (tile_idx, rotation_count, (row, col)) in solution)
+  puzzle = Puzzle(tiles=tiles)
+  puzzle.reset()
+  while len(pending) > 0:
+    coord = next(coord for coord in pending if coord in puzzle.allowed_coords)
+    (tile_idx, rotation_count) = pending.pop(coord)
+    assert puzzle.place_tile(tile=tiles[tile_idx], rotation_count=rotation_count, coord=coord) is True
+  assert len(puzzle.remaining_tiles()) == 0
+  # and it is closed, no edge points out of the layout
+  assert not any(Puzzle._must_fill(required_codes=puzzle._coord_requirements(coord=coord)[0]) for coord in puzzle.allowed_coords)
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Dict, Tuple
+import random
+
+
+class TranspositionTable:
+  # what is known about a partial board that was searched before
+  EXPANDED = 1
+  DEAD = 2
+
+  DEFAULT_CAPACITY = 1 << 18
+
+  def __init__(self, capacity: int = DEFAULT_CAPACITY):
+    self._capacity = capacity
+    # state hash: EXPANDED or DEAD, least recently used first
+    self._states: OrderedDict = OrderedDict()
+    self._hits = 0
+    self._misses = 0
+    self._evictions = 0
+
+  @property
+  def hits(self) -> int:
+    return self._hits
+
+  @property
+  def misses(self) -> int:
+    return self._misses
+
+  @property
+  def evictions(self) -> int:
+    return self._evictions
+
+  @property
+  def stats(self) -> Dict[str, int]:
+    return {'hits': self._hits, 'misses': self._misses, 'evictions': self._evictions, 'size': len(self._states)}
+
+  def lookup(self, state_hash: int) -> int:
+    # EXPANDED, DEAD or None for a state not seen yet
+    state = self._states.get(state_hash)
+    if state is None:
+      self._misses += 1
+    else:
+      self._hits += 1
+      self._states.move_to_end(state_hash)
+
+    return state
+
+  def store(self, state_hash: int, state: int) -> None:
+    self._states[state_hash] = state
+    self._states.move_to_end(state_hash)
+    if len(self._states) > self._capacity:
+      self._states.popitem(last=False)
+      self._evictions += 1
+
+  def __len__(self) -> int:
+    return len(self._states)
+
+
+_ZOBRIST_KEYS: Dict[Tuple, int] = {}
+
+
+def zobrist_key(feature: Tuple) -> int:
+  # a random 64 bit key per feature of ints, e.g. (edge codes, row offset, col offset)
+  # seeded by the feature itself so every process and run agrees on the keys
+  key = _ZOBRIST_KEYS.get(feature)
+  if key is None:
+    key = _ZOBRIST_KEYS[feature] = random.Random(hash(feature)).getrandbits(64)
+
+  return key
+
+
+if __name__ == '__main__':
+  table = TranspositionTable(capacity=2)
+  assert table.lookup(state_hash=1) is None
+  table.store(state_hash=1, state=TranspositionTable.EXPANDED)
+  table.store(state_hash=2, state=TranspositionTable.DEAD)
+  assert table.lookup(state_hash=1) == TranspositionTable.EXPANDED
+  # 2 is now the least recently used and gets evicted
+  table.store(state_hash=3, state=TranspositionTable.DEAD)
+  assert table.lookup(state_hash=2) is None
+  assert table.lookup(state_hash=3) == TranspositionTable.DEAD
+  assert len(table) == 2
+  assert table.stats == {'hits': 2, 'misses': 2, 'evictions': 1, 'size': 2}
+  # zobrist keys are stable per feature
+  assert zobrist_key(feature=((1, 0, 0, 0), 0, 1)) == zobrist_key(feature=((1, 0, 0, 0), 0, 1))
+  assert zobrist_key(feature=((1, 0, 0, 0), 0, 1)) != zobrist_key(feature=((1, 0, 0, 0), 1, 0))